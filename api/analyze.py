@@ -6,107 +6,410 @@ import os
 import sys
 import time
 import uuid
+import functools
+import hashlib
+import heapq
+import importlib.util
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
+from types import MappingProxyType
 from http.server import BaseHTTPRequestHandler
 import json
 
 # Add backend directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
+# Fast JSON encoding when orjson is installed, stdlib json otherwise
+try:
+    import orjson
+    
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+    
+    _loads = json.loads
+
+# Pre-encoded bodies for the fixed error responses
+_ERR_UNAVAILABLE = _dumps({
+    'error': 'Analysis functionality not available',
+    'message': 'Required dependencies missing',
+    'status': 503
+})
+_ERR_BAD_JSON = _dumps({'error': 'Invalid JSON data', 'status': 400})
+_ERR_TOO_LARGE = _dumps({'error': 'Request body too large', 'status': 413})
+
+# Bounds on request size so one oversized document can't exhaust the container
+MAX_BODY_BYTES = 5 * 1024 * 1024
+MAX_DOCUMENT_CHARS = 2 * 1024 * 1024
+
 try:
     from document_processor import DocumentProcessor
     from query_parser import QueryParser
-    from local_ai_client import LocalAIClient
-    from openai_client import OpenAIClient
     
-    # Try to import vector search with fallbacks
-    try:
-        from vector_search import VectorSearch
-        SEARCH_TYPE = "Advanced semantic search"
-    except ImportError:
-        try:
-            from enhanced_vector_search import EnhancedVectorSearch as VectorSearch
-            SEARCH_TYPE = "Enhanced TF-IDF search"
-        except ImportError:
-            from simple_vector_search import SimpleVectorSearch as VectorSearch
-            SEARCH_TYPE = "Simple text search"
-            
     ANALYSIS_AVAILABLE = True
-    LOCAL_AI_AVAILABLE = LocalAIClient is not None
-    OPENAI_AVAILABLE = OpenAIClient is not None
+    
+    # Stateless helpers shared by every request in a warm container
+    _PARSER = QueryParser()
+    _PROCESSOR = DocumentProcessor()
     
 except ImportError as e:
     print(f"Import error in analyze.py: {e}")
     DocumentProcessor = None
     QueryParser = None
-    LocalAIClient = None
-    OpenAIClient = None
-    VectorSearch = None
-    SEARCH_TYPE = "Analysis unavailable"
     ANALYSIS_AVAILABLE = False
-    LOCAL_AI_AVAILABLE = False
-    OPENAI_AVAILABLE = False
+    _PARSER = None
+    _PROCESSOR = None
+
+# The local AI client is imported once here: a module that exists can still fail
+# to import, and requests must not be routed to it then. Its models load lazily.
+LocalAIClient = None
+if ANALYSIS_AVAILABLE:
+    try:
+        from local_ai_client import LocalAIClient
+    except ImportError as e:
+        print(f"Local AI unavailable in analyze.py: {e}")
+LOCAL_AI_AVAILABLE = LocalAIClient is not None
+
+# The OpenAI SDK and search backends (torch, sentence-transformers) are heavy to
+# import, so they are imported on first use rather than at cold start.
+# Availability is checked without importing them.
+OpenAIClient = None
+VectorSearch = None
+SEARCH_TYPE = "Not loaded" if ANALYSIS_AVAILABLE else "Analysis unavailable"
+OPENAI_AVAILABLE = ANALYSIS_AVAILABLE and importlib.util.find_spec('openai') is not None
+_import_lock = threading.Lock()
+
+def _get_vector_search_class():
+    """Resolve the best available vector search backend on first use"""
+    global VectorSearch, SEARCH_TYPE
+    if VectorSearch is None:
+        with _import_lock:
+            if VectorSearch is None:
+                # Try to import vector search with fallbacks
+                try:
+                    from vector_search import VectorSearch as search_class
+                    search_type = "Advanced semantic search"
+                except ImportError:
+                    try:
+                        from enhanced_vector_search import EnhancedVectorSearch as search_class
+                        search_type = "Enhanced TF-IDF search"
+                    except ImportError:
+                        from simple_vector_search import SimpleVectorSearch as search_class
+                        search_type = "Simple text search"
+                SEARCH_TYPE = search_type
+                VectorSearch = search_class
+    return VectorSearch
+
+def _get_openai_client_class():
+    """Import OpenAIClient on first use"""
+    global OpenAIClient
+    if OpenAIClient is None:
+        with _import_lock:
+            if OpenAIClient is None:
+                from openai_client import OpenAIClient as client_class
+                OpenAIClient = client_class
+    return OpenAIClient
+
+# One client per API key, so warm containers reuse its HTTP connection pool
+@functools.lru_cache(maxsize=8)
+def _get_openai_client(api_key):
+    return _get_openai_client_class()(api_key=api_key)
+
+@functools.lru_cache(maxsize=2048)
+def _parse_query_cached(query):
+    return _PARSER.parse_query(query)
+
+def _parse_query(query):
+    """Parse a query, reusing the result for repeated query strings"""
+    # Copy so callers can't mutate the cached dict
+    return dict(_parse_query_cached(query))
+
+# Worker threads that let query parsing overlap with document search. AI calls
+# get their own pool: a timed-out call keeps its thread, and hung calls must not
+# starve query parsing
+_POOL = ThreadPoolExecutor(max_workers=4)
+_AI_POOL = ThreadPoolExecutor(max_workers=4)
+AI_TIMEOUT_SECONDS = float(os.getenv('AI_TIMEOUT_SECONDS', 25))
+PARSE_TIMEOUT_SECONDS = 5
+
+_local_ai_client = None
+_local_ai_lock = threading.Lock()
+
+def _get_local_ai_client():
+    """Lazy loading of the shared LocalAIClient, whose models are expensive to load"""
+    global _local_ai_client
+    if _local_ai_client is None:
+        with _local_ai_lock:
+            if _local_ai_client is None:
+                _local_ai_client = LocalAIClient()
+    return _local_ai_client
+
+class _ResultCache:
+    """Thread-safe LRU cache of analysis responses with a time-to-live."""
+    
+    def __init__(self, max_size=512, ttl_seconds=300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+    
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate_document(self, doc_key):
+        """Drop every cached response for a document."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == doc_key]:
+                del self._entries[key]
+
+_RESULT_CACHE = _ResultCache(max_size=512, ttl_seconds=300)
+
+# Process-level LRU cache of chunked and indexed documents, reused across
+# warm invocations so repeat queries against a document skip indexing
+INDEX_CACHE_SIZE = 32
+_index_cache = OrderedDict()
+# Latest content hash per document_id, bounded like the index cache. Forgetting an
+# id only skips an early eviction; cached indexes and results are keyed by content.
+DOCUMENT_ID_CACHE_SIZE = 1024
+_document_hashes = OrderedDict()
+_index_lock = threading.RLock()
+
+_WORD_RE = re.compile(r'\w+')
+
+# Parsed query fields echoed back to the client
+_PARSED_COMPONENT_KEYS = frozenset(['age', 'gender', 'procedure', 'location', 'policy_duration', 'query_type'])
+
+# Fixed part of the rule-based answer used when no AI analysis is available
+_FALLBACK_ANALYSIS = MappingProxyType({
+    "decision": "Requires Manual Review",
+    "confidence": "Medium",
+    "recommendations": (
+        "Review the query parameters and document content",
+        "Consider using AI analysis for more detailed insights",
+        "Consult with domain experts if needed"
+    ),
+    "risk_level": "Medium",
+    "next_steps": (
+        "Manual review recommended",
+        "Gather additional information if needed"
+    )
+})
+
+# Defaults for fields an AI client may leave out of its analysis result
+_DEFAULT_ANALYSIS = {
+    'decision': 'Pending',
+    'confidence': 'Medium',
+    'risk_level': 'Medium',
+    'justification': 'Analysis completed',
+    'detailed_factors': [],
+    'clause_references': [],
+    'recommendations': [],
+    'next_steps': []
+}
+
+def _preview(text, limit=200):
+    """Return text shortened to limit characters, only copying when it is longer"""
+    if len(text) <= limit:
+        return text
+    return text[:limit] + '...'
+
+def _hash_document(document_text):
+    """Return a short raw content digest used as the index cache key."""
+    return hashlib.blake2b(document_text.encode('utf-8', errors='ignore'), digest_size=16).digest()
+
+def _build_document_index(document_text):
+    """Chunk a document and build a search index over the chunks"""
+    chunks = _PROCESSOR.chunk_text(document_text)
+    chunk_count = len(chunks)
+    text_length = len(document_text)
+    document_stats = {
+        'total_chunks': chunk_count,
+        'total_characters': text_length,
+        'average_chunk_size': text_length // chunk_count if chunk_count else 0
+    }
+    
+    vector_search = None
+    try:
+        if chunk_count > 0:
+            vector_search = _get_vector_search_class()()
+            
+            # Every backend indexes all chunks in one batched call
+            vector_search.build_index(chunks)
+    except Exception as index_error:
+        print(f"Vector search failed in analysis: {index_error}")
+        vector_search = None
+    
+    return {
+        'chunks': chunks,
+        # Tokenized once here so keyword fallback scoring is only set intersections
+        'chunk_tokens': [frozenset(_WORD_RE.findall(chunk.lower())) for chunk in chunks],
+        'vector_search': vector_search,
+        'document_stats': document_stats
+    }
+
+def _keyword_search(query, chunks, chunk_tokens, k=3):
+    """
+    Rank chunks by how many distinct query words they contain.
+    
+    Args:
+        query: Query string
+        chunks: Document chunks
+        chunk_tokens: Per-chunk frozenset of lowercased word tokens
+        k: Number of chunks to return
+        
+    Returns:
+        Up to k chunks with at least one match, best first
+    """
+    query_words = set(_WORD_RE.findall(query.lower()))
+    if not query_words:
+        return []
+    
+    scores = [len(query_words & tokens) for tokens in chunk_tokens]
+    top = heapq.nlargest(k, range(len(chunks)), key=scores.__getitem__)
+    return [chunks[i] for i in top if scores[i] > 0]
+
+def _get_document_index(document_text, document_id=None, doc_hash=None):
+    """
+    Return the cached index for a document, building it on a miss.
+    
+    Args:
+        document_text: Full document text
+        document_id: Optional client-side document identifier
+        doc_hash: Precomputed content hash of document_text
+        
+    Returns:
+        Dictionary with chunks, chunk_tokens, vector_search and document_stats
+    """
+    if doc_hash is None:
+        doc_hash = _hash_document(document_text)
+    
+    with _index_lock:
+        if document_id:
+            # The same document_id with new content invalidates the old index
+            previous_hash = _document_hashes.get(document_id)
+            if previous_hash is not None and previous_hash != doc_hash:
+                _index_cache.pop(previous_hash, None)
+                _RESULT_CACHE.invalidate_document(previous_hash)
+            _document_hashes[document_id] = doc_hash
+            _document_hashes.move_to_end(document_id)
+            while len(_document_hashes) > DOCUMENT_ID_CACHE_SIZE:
+                _document_hashes.popitem(last=False)
+        
+        cached = _index_cache.get(doc_hash)
+        if cached is not None:
+            _index_cache.move_to_end(doc_hash)
+            return cached
+    
+    # Build outside the lock so other documents are not blocked
+    entry = _build_document_index(document_text)
+    
+    with _index_lock:
+        _index_cache[doc_hash] = entry
+        _index_cache.move_to_end(doc_hash)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    
+    return entry
+
+# Responses larger than this are written in WRITE_CHUNK_SIZE slices
+LARGE_RESPONSE_SIZE = 64 * 1024
+WRITE_CHUNK_SIZE = 16 * 1024
 
 class handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        """Handle AI analysis requests"""
-        # Set CORS headers
+    def _send_cors_headers(self):
+        """Add the CORS headers shared by every response"""
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+    
+    def _send_json(self, status, payload):
+        """Send a JSON response with CORS headers and an explicit Content-Length"""
+        body = payload if isinstance(payload, bytes) else _dumps(payload)
+        self.send_response(status)
+        self._send_cors_headers()
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
         
+        if len(body) <= LARGE_RESPONSE_SIZE:
+            self.wfile.write(body)
+            return
+        view = memoryview(body)
+        for offset in range(0, len(body), WRITE_CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + WRITE_CHUNK_SIZE])
+    
+    def do_POST(self):
+        """Handle AI analysis requests"""
         try:
             if not ANALYSIS_AVAILABLE:
-                self.send_response(503)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {
-                    'error': 'Analysis functionality not available',
-                    'message': 'Required dependencies missing',
-                    'status': 503
-                }
-                self.wfile.write(json.dumps(response).encode())
+                self._send_json(503, _ERR_UNAVAILABLE)
                 return
                 
+            # Reject malformed and oversized bodies before reading them
+            try:
+                content_length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                self._send_json(400, _ERR_BAD_JSON)
+                return
+            if content_length > MAX_BODY_BYTES:
+                # The body is left unread, so the connection can't be reused
+                self.close_connection = True
+                self._send_json(413, _ERR_TOO_LARGE)
+                return
+            
             # Read request data
-            content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             
             # Parse JSON data
             try:
-                data = json.loads(post_data.decode('utf-8'))
+                data = _loads(post_data)
             except json.JSONDecodeError:
-                self.send_response(400)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {'error': 'Invalid JSON data', 'status': 400}
-                self.wfile.write(json.dumps(response).encode())
+                self._send_json(400, _ERR_BAD_JSON)
                 return
             
             # Process the analysis
             response = self.handle_analysis(data)
             
-            self.send_response(200 if response.get('success') else 400)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self._send_json(200 if response.get('success') else 400, response)
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            error_response = {
+            self._send_json(500, {
                 'error': f'Analysis processing failed: {str(e)}',
                 'status': 500
-            }
-            self.wfile.write(json.dumps(error_response).encode())
+            })
     
     def do_OPTIONS(self):
         """Handle preflight CORS requests"""
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self._send_cors_headers()
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def handle_analysis(self, data):
@@ -128,42 +431,57 @@ class handler(BaseHTTPRequestHandler):
                     'status': 400
                 }
             
-            # Parse the query using existing module
-            parser = QueryParser()
-            parsed_query = parser.parse_query(query)
+            warning = None
+            if len(document_text) > MAX_DOCUMENT_CHARS:
+                document_text = document_text[:MAX_DOCUMENT_CHARS]
+                warning = f'Document truncated to the first {MAX_DOCUMENT_CHARS} characters'
+            
+            # Serve repeated questions about the same document from the result cache.
+            # OpenAI results are keyed by a fingerprint of the caller's API key, so
+            # they are never served to callers without that key
+            doc_hash = _hash_document(document_text) if document_text else None
+            cacheable = bool(use_local_ai or openai_api_key)
+            key_fingerprint = None if use_local_ai else hashlib.blake2b(
+                openai_api_key.encode('utf-8', errors='ignore'), digest_size=16
+            ).digest()
+            cache_key = (
+                doc_hash or 'no_document',
+                hashlib.blake2b(query.encode('utf-8', errors='ignore'), digest_size=16).digest(),
+                use_local_ai,
+                key_fingerprint
+            )
+            cached = _RESULT_CACHE.get(cache_key) if cacheable else None
+            if cached is not None:
+                response = dict(cached)
+                response['analysis_id'] = analysis_id
+                response['timestamp'] = datetime.utcnow().isoformat() + 'Z'
+                response['system'] = dict(cached['system'])
+                response['system']['processing_time'] = f'{time.time() - start_time:.3f}s'
+                response['system']['cache_hit'] = True
+                if cached.get('document_analysis'):
+                    response['document_analysis'] = dict(cached['document_analysis'], document_id=document_id)
+                return response
+            
+            # Parse the query in the background while the document is searched
+            parse_future = _POOL.submit(_parse_query, query)
             
             # Process document and find relevant chunks if provided
             relevant_chunks = []
             document_stats = {}
             
             if document_text:
-                processor = DocumentProcessor()
-                chunks = processor.chunk_text(document_text)
-                document_stats = {
-                    'total_chunks': len(chunks),
-                    'total_characters': len(document_text),
-                    'average_chunk_size': len(document_text) // len(chunks) if chunks else 0
-                }
+                document_index = _get_document_index(document_text, data.get('document_id'), doc_hash)
+                chunks = document_index['chunks']
+                document_stats = document_index['document_stats']
+                vector_search = document_index['vector_search']
                 
-                # Find relevant chunks using search
+                # Find relevant chunks using the cached index
                 try:
-                    if VectorSearch and len(chunks) > 0:
-                        vector_search = VectorSearch()
-                        
-                        # Handle different vector search interfaces
+                    if vector_search is not None and hasattr(vector_search, 'search'):
                         if hasattr(vector_search, 'build_index'):
-                            vector_search.build_index(chunks)
-                            if hasattr(vector_search, 'search'):
-                                relevant_chunks = vector_search.search(query, k=3)
-                        elif hasattr(vector_search, 'add_documents'):
-                            vector_search.add_documents(chunks)
-                            if hasattr(vector_search, 'search'):
-                                relevant_chunks = vector_search.search(query, top_k=3)
+                            relevant_chunks = vector_search.search(query, k=3)
                         else:
-                            # Simple search fallback
-                            vector_search.documents = chunks
-                            if hasattr(vector_search, 'search'):
-                                relevant_chunks = vector_search.search(query, top_k=3)
+                            relevant_chunks = vector_search.search(query, top_k=3)
                                 
                 except Exception as search_error:
                     print(f"Vector search failed in analysis: {search_error}")
@@ -172,19 +490,18 @@ class handler(BaseHTTPRequestHandler):
                 
                 # Fallback to simple search if vector search failed
                 if not relevant_chunks:
-                    query_words = query.lower().split()
-                    scored_chunks = []
-                    for chunk in chunks:
-                        score = sum(1 for word in query_words if word in chunk.lower())
-                        if score > 0:
-                            scored_chunks.append((score, chunk))
-                    scored_chunks.sort(reverse=True)
-                    relevant_chunks = [chunk for _, chunk in scored_chunks[:3]]
+                    relevant_chunks = _keyword_search(query, chunks, document_index['chunk_tokens'])
                     
                     # If still no results, use first few chunks
                     if not relevant_chunks:
                         relevant_chunks = chunks[:3]
             
+            try:
+                parsed_query = parse_future.result(timeout=PARSE_TIMEOUT_SECONDS)
+            except FutureTimeoutError:
+                # Parsing is cheap, so a stalled pool shouldn't hold up the request
+                parsed_query = _parse_query(query)
+            
             # Perform AI analysis
             analysis_result = None
             ai_method = "rule_based_fallback"
@@ -192,8 +509,9 @@ class handler(BaseHTTPRequestHandler):
             # Try Local AI first if requested
             if use_local_ai and LOCAL_AI_AVAILABLE:
                 try:
-                    local_ai = LocalAIClient()
-                    analysis_result = local_ai.analyze_query(parsed_query, relevant_chunks, query)
+                    local_ai = _get_local_ai_client()
+                    analysis_future = _AI_POOL.submit(local_ai.analyze_query, parsed_query, relevant_chunks, query)
+                    analysis_result = analysis_future.result(timeout=AI_TIMEOUT_SECONDS)
                     ai_method = "local_ai"
                 except Exception as e:
                     print(f"Local AI analysis failed: {e}")
@@ -201,19 +519,10 @@ class handler(BaseHTTPRequestHandler):
             # Try OpenAI if local AI failed or not requested
             elif not use_local_ai and OPENAI_AVAILABLE and openai_api_key:
                 try:
-                    # Set API key temporarily
-                    original_key = os.environ.get('OPENAI_API_KEY')
-                    os.environ['OPENAI_API_KEY'] = openai_api_key
-                    
-                    openai_client = OpenAIClient()
-                    analysis_result = openai_client.analyze_query(parsed_query, relevant_chunks, query)
+                    openai_client = _get_openai_client(openai_api_key)
+                    analysis_future = _AI_POOL.submit(openai_client.analyze_query, parsed_query, relevant_chunks, query)
+                    analysis_result = analysis_future.result(timeout=AI_TIMEOUT_SECONDS)
                     ai_method = "openai_gpt"
-                    
-                    # Restore original API key
-                    if original_key:
-                        os.environ['OPENAI_API_KEY'] = original_key
-                    elif 'OPENAI_API_KEY' in os.environ:
-                        del os.environ['OPENAI_API_KEY']
                         
                 except Exception as e:
                     print(f"OpenAI analysis failed: {e}")
@@ -221,24 +530,16 @@ class handler(BaseHTTPRequestHandler):
             # Fallback analysis if AI methods failed
             if not analysis_result:
                 analysis_result = {
-                    "decision": "Requires Manual Review",
-                    "confidence": "Medium",
+                    **_FALLBACK_ANALYSIS,
                     "justification": f"Basic analysis completed for query: '{query}'. " + 
                                    ("Document content analyzed. " if document_text else "No document provided. ") +
-                                   "Advanced AI analysis unavailable - please review manually.",
-                    "recommendations": [
-                        "Review the query parameters and document content",
-                        "Consider using AI analysis for more detailed insights",
-                        "Consult with domain experts if needed"
-                    ],
-                    "risk_level": "Medium",
-                    "next_steps": [
-                        "Manual review recommended",
-                        "Gather additional information if needed"
-                    ]
+                                   "Advanced AI analysis unavailable - please review manually."
                 }
                 ai_method = "rule_based_fallback"
             
+            # Fill in missing fields once instead of a .get() per field
+            analysis_result = {**_DEFAULT_ANALYSIS, **analysis_result}
+            
             # Calculate processing time
             processing_time = time.time() - start_time
             
@@ -251,28 +552,28 @@ class handler(BaseHTTPRequestHandler):
                     'original': query,
                     'parsed_components': {
                         key: value for key, value in parsed_query.items() 
-                        if value and key in ['age', 'gender', 'procedure', 'location', 'policy_duration', 'query_type']
+                        if value and key in _PARSED_COMPONENT_KEYS
                     },
                     'domain': parsed_query.get('query_type', 'general')
                 },
                 'analysis': {
                     'decision': {
-                        'status': analysis_result.get('decision', 'Pending'),
-                        'confidence': analysis_result.get('confidence', 'Medium'),
-                        'risk_level': analysis_result.get('risk_level', 'Medium')
+                        'status': analysis_result['decision'],
+                        'confidence': analysis_result['confidence'],
+                        'risk_level': analysis_result['risk_level']
                     },
                     'justification': {
-                        'summary': analysis_result.get('justification', 'Analysis completed'),
-                        'detailed_factors': analysis_result.get('detailed_factors', []),
-                        'clause_references': analysis_result.get('clause_references', [])
+                        'summary': analysis_result['justification'],
+                        'detailed_factors': analysis_result['detailed_factors'],
+                        'clause_references': analysis_result['clause_references']
                     },
-                    'recommendations': analysis_result.get('recommendations', []),
-                    'next_steps': analysis_result.get('next_steps', [])
+                    'recommendations': analysis_result['recommendations'],
+                    'next_steps': analysis_result['next_steps']
                 },
                 'document_analysis': {
                     'document_id': document_id,
                     'chunks_analyzed': len(relevant_chunks),
-                    'relevant_content_preview': relevant_chunks[0][:200] + '...' if relevant_chunks else None,
+                    'relevant_content_preview': _preview(relevant_chunks[0]) if relevant_chunks else None,
                     'document_stats': document_stats
                 } if document_text else None,
                 'system': {
@@ -289,6 +590,13 @@ class handler(BaseHTTPRequestHandler):
                 }
             }
             
+            if warning:
+                response['warning'] = warning
+            
+            # Don't pin rule-based fallbacks; AI may be available on the next call
+            if cacheable and ai_method != "rule_based_fallback":
+                _RESULT_CACHE.put(cache_key, response)
+            
             return response
             
         except Exception as e:
@@ -1,19 +1,87 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import os
+import re
 import sys
-import tempfile
-import io
+import time
+import uuid
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
-# Add the parent directory to the path so we can import our modules
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
+# Fast JSON encoding when orjson is installed, stdlib json otherwise
 try:
-    from document_processor import DocumentProcessor
-    from query_parser import QueryParser
-    from local_ai_client import LocalAIClient
-    from database_manager import DatabaseManager
-    from dependency_checker import DependencyChecker
+    import orjson
+    
+    def _dumps(obj):
+        # NumPy scalars and arrays from the stats and search paths encode natively
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+    
+    _loads = json.loads
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Pre-encoded bodies for the fixed error responses
+_ERR_BAD_JSON = _dumps({'error': 'Invalid JSON data', 'status': 400})
+_ERR_NOT_FOUND = _dumps({'error': 'Endpoint not found', 'status': 404})
+_ERR_TOO_LARGE = _dumps({'error': 'Request body too large', 'status': 413})
+
+# Largest request body read into memory; bigger uploads are rejected unread
+MAX_BODY_BYTES = int(os.environ.get('DOCQUERY_MAX_BODY', 8 * 1024 * 1024))
+
+# Backend modules are imported on first use so cold starts that only serve
+# /api/status or CORS preflights skip the document and search stacks
+SEARCH_TYPE = "Not loaded"
+
+@functools.lru_cache(maxsize=None)
+def _dp():
+    """Return the DocumentProcessor class, or None if it cannot be imported"""
+    try:
+        from document_processor import DocumentProcessor
+        return DocumentProcessor
+    except ImportError as e:
+        print(f"Import error: {e}")
+        return None
+
+@functools.lru_cache(maxsize=None)
+def _qp():
+    """Return the QueryParser class, or None if it cannot be imported"""
+    try:
+        from query_parser import QueryParser
+        return QueryParser
+    except ImportError as e:
+        print(f"Import error: {e}")
+        return None
+
+@functools.lru_cache(maxsize=None)
+def _ai():
+    """Return the LocalAIClient class, or None if it cannot be imported"""
+    try:
+        from local_ai_client import LocalAIClient
+        return LocalAIClient
+    except ImportError as e:
+        print(f"Import error: {e}")
+        return None
+
+@functools.lru_cache(maxsize=None)
+def _vs():
+    """Return the best available vector search class and record its SEARCH_TYPE"""
+    global SEARCH_TYPE
     
     # Try to import advanced vector search, fallback to simpler alternatives
     try:
@@ -24,29 +92,344 @@ try:
             from enhanced_vector_search import EnhancedVectorSearch as VectorSearch
             SEARCH_TYPE = "Enhanced semantic search with TF-IDF"
         except ImportError:
-            from simple_vector_search import SimpleVectorSearch as VectorSearch
-            SEARCH_TYPE = "Simple text-based search"
-except ImportError as e:
-    print(f"Import error: {e}")
-    # Fallback to minimal functionality
-    DocumentProcessor = None
-    QueryParser = None
-    LocalAIClient = None
-    DatabaseManager = None
-    DependencyChecker = None
-    VectorSearch = None
-    SEARCH_TYPE = "Limited functionality"
+            try:
+                from simple_vector_search import SimpleVectorSearch as VectorSearch
+                SEARCH_TYPE = "Simple text-based search"
+            except ImportError as e:
+                print(f"Import error: {e}")
+                SEARCH_TYPE = "Limited functionality"
+                return None
+    return VectorSearch
+
+# Stateless helpers shared by every request in a warm container, built on
+# first use. Vector search indexes are per document and live in _index_cache.
+_processor = None
+_processor_lock = threading.Lock()
+_query_parser = None
+_query_parser_lock = threading.Lock()
+_ai_client = None
+_ai_client_lock = threading.Lock()
+
+def get_processor():
+    """Return the shared DocumentProcessor, or None if it is unavailable"""
+    global _processor
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None and _dp():
+                _processor = _dp()()
+    return _processor
+
+def get_query_parser():
+    """Return the shared QueryParser, or None if it is unavailable"""
+    global _query_parser
+    if _query_parser is None:
+        with _query_parser_lock:
+            if _query_parser is None and _qp():
+                _query_parser = _qp()()
+    return _query_parser
+
+def get_ai_client():
+    """Return the shared LocalAIClient, or None if it is unavailable"""
+    global _ai_client
+    if _ai_client is None:
+        with _ai_client_lock:
+            if _ai_client is None and _ai():
+                _ai_client = _ai()()
+    return _ai_client
+
+@functools.lru_cache(maxsize=1024)
+def _parse_query_cached(query):
+    return get_query_parser().parse_query(query)
+
+def _parse_query(query):
+    """Parse a query, reusing the result for repeated query strings"""
+    # Copy so callers can't mutate the cached dict
+    return dict(_parse_query_cached(query))
+
+# Worker threads that parse queries while the document is chunked and indexed
+_POOL = ThreadPoolExecutor(max_workers=2)
+
+try:
+    from semantic_cache import SemanticCache
+except ImportError:
+    SemanticCache = None
+
+# Process-level LRU cache of processed and indexed documents, keyed by content
+# hash, so repeat queries against a document skip chunking and index builds
+INDEX_CACHE_SIZE = 32
+_index_cache = OrderedDict()
+_index_lock = threading.RLock()
+# Per-hash locks for indexes being built, so concurrent analyze and query
+# requests for the same new document share one build
+_index_build_locks = {}
+
+def _hash_document(document_text):
+    """Return the content hash clients can send back as document_hash."""
+    return hashlib.blake2b(document_text.encode('utf-8', errors='ignore'), digest_size=16).hexdigest()
+
+_WORD_RE = re.compile(r'\S+')
+
+def _count_words(text):
+    """Count whitespace-separated words without building a token list"""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+@functools.lru_cache(maxsize=1)
+def _format_timestamp(second):
+    """Format a Unix second as an ISO 8601 UTC timestamp"""
+    return datetime.fromtimestamp(second, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+def _timestamp():
+    """Return the current UTC timestamp, formatted at most once per second"""
+    return _format_timestamp(int(time.time()))
+
+def _preview(text, limit=200):
+    """Return text shortened to limit characters, only copying when it is longer"""
+    if len(text) <= limit:
+        return text
+    return text[:limit] + '...'
+
+def _build_document_index(document_text):
+    """Clean and chunk a document and build a search index over the chunks"""
+    processor = get_processor()
+    if processor:
+        processed_content = processor.process_text(document_text)
+        chunks = processor.chunk_text(processed_content)
+    else:
+        # Simple chunking fallback
+        processed_content = document_text
+        chunks = [document_text[i:i+2000] for i in range(0, len(document_text), 2000)]
+    
+    vector_search = None
+    try:
+        VectorSearch = _vs()
+        if VectorSearch and len(chunks) > 0:
+            vector_search = VectorSearch()
+            
+            # Every backend indexes all chunks in one batched call
+            vector_search.build_index(chunks)
+    except Exception as search_error:
+        print(f"Vector search initialization failed: {search_error}")
+        vector_search = None
+    
+    return {
+        'processed_content': processed_content,
+        'content_preview': _preview(processed_content, 1000),
+        'word_count': _count_words(processed_content),
+        'chunks': chunks,
+        'chunk_stats': _chunk_stats(chunks),
+        'vector_search': vector_search
+    }
+
+# Chunk-size histogram bucket edges, and the chunk count above which the
+# histogram is computed with NumPy instead of a Python loop
+CHUNK_SIZE_EDGES = (500, 1500)
+VECTORIZED_STATS_MIN_CHUNKS = 512
+
+def _chunk_stats(chunks):
+    """Compute the average chunk size and chunk-size histogram in one pass"""
+    if NUMPY_AVAILABLE and len(chunks) > VECTORIZED_STATS_MIN_CHUNKS:
+        lengths = np.fromiter(map(len, chunks), dtype=np.int64, count=len(chunks))
+        total_length = int(lengths.sum())
+        small, medium, large = (
+            int(count) for count in
+            np.bincount(np.searchsorted(CHUNK_SIZE_EDGES, lengths, side='right'), minlength=3)
+        )
+    else:
+        small = medium = large = total_length = 0
+        for chunk in chunks:
+            length = len(chunk)
+            total_length += length
+            if length < CHUNK_SIZE_EDGES[0]:
+                small += 1
+            elif length < CHUNK_SIZE_EDGES[1]:
+                medium += 1
+            else:
+                large += 1
+    
+    return {
+        'average_chunk_size': total_length // len(chunks) if chunks else 0,
+        'chunk_distribution': {
+            'small_chunks': small,
+            'medium_chunks': medium,
+            'large_chunks': large
+        }
+    }
+
+def _lookup_document_index(doc_hash):
+    """Return the cached index for a content hash, or None if it isn't cached."""
+    with _index_lock:
+        cached = _index_cache.get(doc_hash)
+        if cached is not None:
+            _index_cache.move_to_end(doc_hash)
+        return cached
+
+def _get_document_index(document_text, doc_hash=None):
+    """
+    Return the cached index for a document, building it on a miss.
+    
+    Args:
+        document_text: Full document text
+        doc_hash: Precomputed content hash of document_text
+        
+    Returns:
+        Dictionary with processed_content, content_preview, word_count,
+        chunks, chunk_stats and vector_search
+    """
+    if doc_hash is None:
+        doc_hash = _hash_document(document_text)
+    
+    cached = _lookup_document_index(doc_hash)
+    if cached is not None:
+        return cached
+    
+    with _index_lock:
+        build_lock = _index_build_locks.setdefault(doc_hash, threading.Lock())
+    
+    # Build outside the cache lock so other documents are not blocked
+    with build_lock:
+        try:
+            cached = _lookup_document_index(doc_hash)
+            if cached is not None:
+                return cached
+            
+            entry = _build_document_index(document_text)
+            
+            with _index_lock:
+                _index_cache[doc_hash] = entry
+                _index_cache.move_to_end(doc_hash)
+                while len(_index_cache) > INDEX_CACHE_SIZE:
+                    _index_cache.popitem(last=False)
+        finally:
+            with _index_lock:
+                _index_build_locks.pop(doc_hash, None)
+    
+    return entry
+
+def _search_chunks(vector_search, query, k=3, query_embedding=None):
+    """Search an index, adapting to the backend's search signature"""
+    if query_embedding is not None:
+        return vector_search.search(query, k=k, query_embedding=query_embedding)
+    if hasattr(vector_search, 'build_index'):
+        return vector_search.search(query, k=k)
+    return vector_search.search(query, top_k=k)
+
+def _embed_query(vector_search, query):
+    """Embed a query with the document's search backend, or return None if unsupported."""
+    if vector_search is None or not hasattr(vector_search, 'encode_queries'):
+        return None
+    try:
+        return vector_search.encode_queries([query])[0]
+    except Exception as e:
+        print(f"Query embedding failed: {e}")
+        return None
+
+# Query responses per document, matched on normalized query text or, when the
+# search backend embeds queries, on near-identical query embeddings
+QUERY_CACHE_THRESHOLD = 0.95
+_query_cache = SemanticCache(threshold=QUERY_CACHE_THRESHOLD) if SemanticCache else None
+_query_cache_lock = threading.Lock()
+
+API_VERSION = 'vercel_api_v1.0'
+
+# Constant parts of the responses, built once and shared between requests
+_PARSED_COMPONENT_KEYS = frozenset(['age', 'gender', 'procedure', 'location', 'policy_duration', 'query_type'])
+_DEFAULT_DETAILED_FACTORS = (
+    'Query parameters evaluated against policy terms',
+    'Document content analysis completed',
+    'Risk assessment performed'
+)
+_DEFAULT_RECOMMENDATIONS = (
+    'Review the analysis details for accuracy',
+    'Consider consulting with a policy expert if needed'
+)
+_DEFAULT_NEXT_STEPS = (
+    'Proceed based on the decision status',
+    'Keep documentation for record-keeping'
+)
+_ERROR_SYSTEM = {'processor_version': API_VERSION}
+
+def _query_section(query_text, parsed_query):
+    """Build the query part of a query response"""
+    return {
+        'original': query_text,
+        'parsed_components': {
+            key: value for key, value in parsed_query.items()
+            if value and key in _PARSED_COMPONENT_KEYS
+        },
+        'domain': parsed_query.get('query_type', 'general')
+    }
+
+def _same_parsed_query(query_section, response):
+    """Whether a cached response was made for a query with the same parsed components"""
+    cached_query = response['query']
+    return (cached_query['parsed_components'] == query_section['parsed_components']
+            and cached_query['domain'] == query_section['domain'])
+
+def _cached_query_response(response, query_text, analysis_id, start_time):
+    """Copy a cached query response with this request's query, id, timestamp and timing"""
+    response = dict(response)
+    response['query'] = dict(response['query'], original=query_text)
+    response['analysis_id'] = analysis_id
+    response['timestamp'] = _timestamp()
+    response['system'] = dict(response['system'])
+    response['system']['processing_time'] = f'{time.time() - start_time:.3f}s'
+    response['system']['cache_hit'] = True
+    return response
+
+# Responses larger than this are written in WRITE_CHUNK_SIZE slices
+LARGE_RESPONSE_SIZE = 64 * 1024
+WRITE_CHUNK_SIZE = 16 * 1024
+
+# Header lines shared by every response, encoded once. Server and Date are
+# left to the platform proxy in front of the function.
+_CORS_HEADERS = (
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n'
+    b'Access-Control-Allow-Headers: Content-Type\r\n'
+)
+_JSON_HEADERS = _CORS_HEADERS + b'Content-Type: application/json\r\n'
+
+# POST endpoints and the handler method that serves each
+_POST_ROUTES = {
+    '/api/analyze': 'handle_analyze',
+    '/api/query': 'handle_query'
+}
 
 class handler(BaseHTTPRequestHandler):
+    def _response_head(self, status, headers, content_length):
+        """Build the status line and header block for a response"""
+        self.log_request(status)
+        return b'%s %d %s\r\n%sContent-Length: %d\r\n\r\n' % (
+            self.protocol_version.encode('latin-1'),
+            status,
+            self.responses[status][0].encode('latin-1'),
+            headers,
+            content_length
+        )
+    
+    def _send_json(self, status, payload):
+        """Send a JSON response with CORS headers and an explicit Content-Length"""
+        body = payload if isinstance(payload, bytes) else _dumps(payload)
+        head = self._response_head(status, _JSON_HEADERS, len(body))
+        
+        if len(body) <= LARGE_RESPONSE_SIZE:
+            # Headers and body go out in a single write
+            self.wfile.write(head + body)
+            return
+        self.wfile.write(head)
+        view = memoryview(body)
+        for offset in range(0, len(body), WRITE_CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + WRITE_CHUNK_SIZE])
+    
     def do_GET(self):
         # Handle status check
         if self.path == '/api/status':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
             # Check system status
+            try:
+                from dependency_checker import DependencyChecker
+            except ImportError:
+                DependencyChecker = None
+            
             if DependencyChecker:
                 dep_checker = DependencyChecker()
                 capabilities = dep_checker.get_capabilities_summary()
@@ -65,15 +448,10 @@ class handler(BaseHTTPRequestHandler):
                 'message': 'DocQuery API is running on Vercel'
             }
             
-            self.wfile.write(json.dumps(response).encode())
+            self._send_json(200, response)
             return
         
         # Default response
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
         response = {
             'message': 'DocQuery API',
             'endpoints': [
@@ -83,61 +461,58 @@ class handler(BaseHTTPRequestHandler):
             ]
         }
         
-        self.wfile.write(json.dumps(response).encode())
+        self._send_json(200, response)
     
     def do_POST(self):
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        route = _POST_ROUTES.get(self.path)
+        if route is None:
+            # Unknown endpoints are rejected without reading the body
+            self.close_connection = True
+            self._send_json(404, _ERR_NOT_FOUND)
+            return
         
         try:
-            # Parse JSON data
-            data = json.loads(post_data.decode('utf-8'))
+            try:
+                content_length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                self._send_json(400, _ERR_BAD_JSON)
+                return
+            if content_length > MAX_BODY_BYTES:
+                # The body is left unread, so the connection can't be reused
+                self.close_connection = True
+                self._send_json(413, _ERR_TOO_LARGE)
+                return
             
-            if self.path == '/api/analyze':
-                response = self.handle_analyze(data)
-            elif self.path == '/api/query':
-                response = self.handle_query(data)
-            else:
-                response = {'error': 'Endpoint not found', 'status': 404}
-                self.send_response(404)
+            # Parse JSON data straight from the request bytes
+            try:
+                data = _loads(self.rfile.read(content_length))
+            except json.JSONDecodeError:
+                self._send_json(400, _ERR_BAD_JSON)
+                return
             
-            if response.get('status') != 404:
-                self.send_response(200)
+            response = getattr(self, route)(data)
             
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            # Handlers report failures through a numeric status field
+            status = response.get('status')
+            self._send_json(status if isinstance(status, int) else 200, response)
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            error_response = {
+            self._send_json(500, {
                 'error': f'Server error: {str(e)}',
                 'status': 500
-            }
-            self.wfile.write(json.dumps(error_response).encode())
+            })
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        self.wfile.write(self._response_head(200, _CORS_HEADERS, 0))
     
     def handle_analyze(self, data):
         """Handle document analysis request with comprehensive processing"""
-        import time
-        from datetime import datetime
-        
         start_time = time.time()
         
         try:
-            if not DocumentProcessor:
+            if not _dp():
                 return {
                     'error': 'Document processing not available',
                     'message': 'Core dependencies missing',
@@ -154,107 +529,78 @@ class handler(BaseHTTPRequestHandler):
                     'status': 400
                 }
             
-            # Process the document
-            processor = DocumentProcessor()
+            # Process, chunk and index the document, reusing a cached result
+            doc_hash = _hash_document(document_text)
+            document_index = _get_document_index(document_text, doc_hash)
+            processed_content = document_index['processed_content']
+            chunks = document_index['chunks']
+            chunk_stats = document_index['chunk_stats']
             
-            # Create a temporary file for processing
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as tmp_file:
-                tmp_file.write(document_text)
-                tmp_file_path = tmp_file.name
+            # Calculate processing statistics
+            processing_time = time.time() - start_time
+            
+            content_length = len(processed_content)
+            word_count = document_index['word_count']
+            
+            search_ready = document_index['vector_search'] is not None
+            
+            # Comprehensive response
+            response = {
+                'success': True,
+                'timestamp': _timestamp(),
+                'document_analysis': {
+                    'document_name': document_name,
+                    'document_hash': doc_hash,
+                    'processed_content': document_index['content_preview'],
+                    'full_content_length': content_length,
+                    'character_count': len(document_text),
+                    'chunk_count': len(chunks),
+                    'average_chunk_size': chunk_stats['average_chunk_size']
+                },
+                'processing_details': {
+                    'processing_time': f'{processing_time:.3f}s',
+                    'search_type': SEARCH_TYPE,
+                    'chunks_created': len(chunks),
+                    'search_ready': search_ready,
+                    'vector_search_available': _vs() is not None
+                },
+                'document_stats': {
+                    'total_characters': content_length,
+                    'total_words': word_count,
+                    'estimated_reading_time': f'{word_count // 200 + 1} min',
+                    'chunk_distribution': chunk_stats['chunk_distribution']
+                },
+                'capabilities': {
+                    'ready_for_queries': True,
+                    'semantic_search': search_ready,
+                    'vector_analysis': _vs() is not None,
+                    'advanced_ai': _ai() is not None
+                },
+                'system': {
+                    'processor_version': API_VERSION,
+                    'search_type': SEARCH_TYPE
+                },
+                'status': 'processed'
+            }
+            
+            return response
             
-            try:
-                processed_content = processor.extract_text(tmp_file_path)
-                
-                # Create text chunks for better search
-                chunks = processor.chunk_text(processed_content)
-                
-                # Calculate processing statistics
-                processing_time = time.time() - start_time
-                avg_chunk_size = len(processed_content) // len(chunks) if chunks else 0
-                
-                # Preview content (first 1000 chars with ellipsis if longer)
-                content_preview = processed_content[:1000] + '...' if len(processed_content) > 1000 else processed_content
-                
-                # Initialize vector search if available
-                search_ready = False
-                try:
-                    if VectorSearch and len(chunks) > 0:
-                        vector_search = VectorSearch()
-                        vector_search.add_documents(chunks)
-                        search_ready = True
-                except Exception as search_error:
-                    print(f"Vector search initialization failed: {search_error}")
-                
-                # Comprehensive response
-                response = {
-                    'success': True,
-                    'timestamp': datetime.now().isoformat() + 'Z',
-                    'document_analysis': {
-                        'document_name': document_name,
-                        'processed_content': content_preview,
-                        'full_content_length': len(processed_content),
-                        'character_count': len(document_text),
-                        'chunk_count': len(chunks),
-                        'average_chunk_size': avg_chunk_size
-                    },
-                    'processing_details': {
-                        'processing_time': f'{processing_time:.3f}s',
-                        'search_type': SEARCH_TYPE,
-                        'chunks_created': len(chunks),
-                        'search_ready': search_ready,
-                        'vector_search_available': VectorSearch is not None
-                    },
-                    'document_stats': {
-                        'total_characters': len(processed_content),
-                        'total_words': len(processed_content.split()),
-                        'estimated_reading_time': f'{len(processed_content.split()) // 200 + 1} min',
-                        'chunk_distribution': {
-                            'small_chunks': len([c for c in chunks if len(c) < 500]),
-                            'medium_chunks': len([c for c in chunks if 500 <= len(c) < 1500]),
-                            'large_chunks': len([c for c in chunks if len(c) >= 1500])
-                        }
-                    },
-                    'capabilities': {
-                        'ready_for_queries': True,
-                        'semantic_search': search_ready,
-                        'vector_analysis': VectorSearch is not None,
-                        'advanced_ai': LocalAIClient is not None
-                    },
-                    'system': {
-                        'processor_version': 'vercel_api_v1.0',
-                        'search_type': SEARCH_TYPE
-                    },
-                    'status': 'processed'
-                }
-                
-                return response
-                
-            finally:
-                # Clean up temp file
-                os.unlink(tmp_file_path)
-                
         except Exception as e:
             processing_time = time.time() - start_time
             return {
                 'error': f'Analysis failed: {str(e)}',
                 'processing_time': f'{processing_time:.3f}s',
-                'system': {
-                    'processor_version': 'vercel_api_v1.0'
-                },
+                'system': _ERROR_SYSTEM,
                 'status': 500
             }
     
     def handle_query(self, data):
         """Handle query processing request with enhanced analysis"""
-        import time
-        import uuid
-        from datetime import datetime
-        
         start_time = time.time()
         analysis_id = str(uuid.uuid4())[:8]
         
         try:
-            if not QueryParser or not LocalAIClient:
+            if not _qp() or not _ai():
                 return {
                     'error': 'Query processing not available',
                     'message': 'Core dependencies missing',
@@ -263,6 +609,7 @@ class handler(BaseHTTPRequestHandler):
             
             query_text = data.get('query', '')
             document_text = data.get('document_text', '')
+            document_hash = data.get('document_hash', '')
             
             if not query_text:
                 return {
@@ -270,43 +617,62 @@ class handler(BaseHTTPRequestHandler):
                     'status': 400
                 }
             
+            # Clients that already sent the document may reference it by hash
+            document_index = None
+            parse_future = None
+            if document_text:
+                # Parse in the background while the document is processed
+                parse_future = _POOL.submit(_parse_query, query_text)
+                document_hash = _hash_document(document_text)
+                document_index = _get_document_index(document_text, document_hash)
+            elif document_hash:
+                document_index = _lookup_document_index(document_hash)
+                if document_index is None:
+                    return {
+                        'error': 'Document not cached, resend document_text',
+                        'need_upload': True,
+                        'status': 409
+                    }
+            
             # Parse the query
-            parser = QueryParser()
-            parsed_query = parser.parse_query(query_text)
+            parsed_query = parse_future.result() if parse_future else _parse_query(query_text)
+            query_section = _query_section(query_text, parsed_query)
+            
+            # Answer repeated or near-identical questions from the response cache.
+            # Near-identical claims can differ in age, gender or location, so a
+            # cached response is only reused when it parsed to the same components.
+            query_embedding = None
+            if document_index is not None and _query_cache is not None:
+                same_parsed_query = functools.partial(_same_parsed_query, query_section)
+                with _query_cache_lock:
+                    cached = _query_cache.lookup(document_hash, query_text, accept=same_parsed_query,
+                                                 count_miss=False)
+                if cached is None:
+                    query_embedding = _embed_query(document_index['vector_search'], query_text)
+                    # The final lookup counts the outcome, so each query is one hit or one miss
+                    with _query_cache_lock:
+                        cached = _query_cache.lookup(document_hash, query_text, query_embedding,
+                                                     accept=same_parsed_query)
+                if cached is not None:
+                    return _cached_query_response(cached, query_text, analysis_id, start_time)
             
             # If document is provided, perform full analysis
-            if document_text:
-                # Process document into chunks for better analysis
-                if DocumentProcessor:
-                    processor = DocumentProcessor()
-                    # Create temporary file for processing
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as tmp_file:
-                        tmp_file.write(document_text)
-                        tmp_file_path = tmp_file.name
-                    
-                    try:
-                        processed_content = processor.extract_text(tmp_file_path)
-                        chunks = processor.chunk_text(processed_content)
-                    finally:
-                        os.unlink(tmp_file_path)
-                else:
-                    # Simple chunking fallback
-                    chunks = [document_text[i:i+2000] for i in range(0, len(document_text), 2000)]
+            if document_index is not None:
+                chunks = document_index['chunks']
+                vector_search = document_index['vector_search']
                 
                 # Perform vector search if available
                 relevant_chunks = chunks[:3]  # Use first few chunks as fallback
                 try:
-                    if VectorSearch and len(chunks) > 0:
-                        vector_search = VectorSearch()
-                        vector_search.add_documents(chunks)
-                        relevant_chunks = vector_search.search(query_text, top_k=3)
+                    if vector_search is not None:
+                        relevant_chunks = _search_chunks(vector_search, query_text, query_embedding=query_embedding) or relevant_chunks
                 except Exception as search_error:
                     print(f"Vector search failed: {search_error}")
                     # Fallback to first few chunks
                     pass
                 
                 # Enhanced AI analysis
-                ai_client = LocalAIClient()
+                ai_client = get_ai_client()
                 
                 # Get comprehensive analysis
                 analysis = ai_client.analyze_query(parsed_query, relevant_chunks, query_text)
@@ -323,15 +689,8 @@ class handler(BaseHTTPRequestHandler):
                 response = {
                     'success': True,
                     'analysis_id': analysis_id,
-                    'timestamp': datetime.now().isoformat() + 'Z',
-                    'query': {
-                        'original': query_text,
-                        'parsed_components': {
-                            key: value for key, value in parsed_query.items() 
-                            if value and key in ['age', 'gender', 'procedure', 'location', 'policy_duration', 'query_type']
-                        },
-                        'domain': parsed_query.get('query_type', 'general')
-                    },
+                    'timestamp': _timestamp(),
+                    'query': query_section,
                     'analysis': {
                         'decision': {
                             'status': decision_status,
@@ -340,36 +699,30 @@ class handler(BaseHTTPRequestHandler):
                         },
                         'justification': {
                             'summary': justification,
-                            'detailed_factors': analysis.get('detailed_factors', [
-                                'Query parameters evaluated against policy terms',
-                                'Document content analysis completed',
-                                'Risk assessment performed'
-                            ]),
+                            'detailed_factors': analysis.get('detailed_factors', _DEFAULT_DETAILED_FACTORS),
                             'clause_references': analysis.get('clause_references', [])
                         },
-                        'recommendations': analysis.get('recommendations', [
-                            'Review the analysis details for accuracy',
-                            'Consider consulting with a policy expert if needed'
-                        ]),
-                        'next_steps': analysis.get('next_steps', [
-                            'Proceed based on the decision status',
-                            'Keep documentation for record-keeping'
-                        ])
+                        'recommendations': analysis.get('recommendations', _DEFAULT_RECOMMENDATIONS),
+                        'next_steps': analysis.get('next_steps', _DEFAULT_NEXT_STEPS)
                     },
                     'document_analysis': {
                         'chunks_processed': len(chunks),
                         'relevant_sections': len(relevant_chunks),
-                        'content_preview': relevant_chunks[0][:200] + '...' if relevant_chunks else None
+                        'content_preview': _preview(relevant_chunks[0]) if relevant_chunks else None
                     },
                     'system': {
-                        'analysis_method': 'Enhanced Local AI + Vector Search' if VectorSearch else 'Local AI Analysis',
+                        'analysis_method': 'Enhanced Local AI + Vector Search' if _vs() else 'Local AI Analysis',
                         'processing_time': f'{processing_time:.3f}s',
-                        'model_version': 'vercel_api_v1.0',
+                        'model_version': API_VERSION,
                         'search_type': SEARCH_TYPE
                     },
                     'status': 'completed'
                 }
                 
+                if _query_cache is not None:
+                    with _query_cache_lock:
+                        _query_cache.store(document_hash, query_text, response, query_embedding)
+                
                 return response
             else:
                 # Query parsing only
@@ -377,19 +730,12 @@ class handler(BaseHTTPRequestHandler):
                 return {
                     'success': True,
                     'analysis_id': analysis_id,
-                    'timestamp': datetime.now().isoformat() + 'Z',
-                    'query': {
-                        'original': query_text,
-                        'parsed_components': {
-                            key: value for key, value in parsed_query.items() 
-                            if value and key in ['age', 'gender', 'procedure', 'location', 'policy_duration', 'query_type']
-                        },
-                        'domain': parsed_query.get('query_type', 'general')
-                    },
+                    'timestamp': _timestamp(),
+                    'query': _query_section(query_text, parsed_query),
                     'message': 'Query parsed successfully. Upload a document for complete analysis.',
                     'system': {
                         'processing_time': f'{processing_time:.3f}s',
-                        'model_version': 'vercel_api_v1.0'
+                        'model_version': API_VERSION
                     },
                     'status': 'parsed'
                 }
@@ -401,7 +747,7 @@ class handler(BaseHTTPRequestHandler):
                 'analysis_id': analysis_id,
                 'system': {
                     'processing_time': f'{processing_time:.3f}s',
-                    'model_version': 'vercel_api_v1.0'
+                    'model_version': API_VERSION
                 },
                 'status': 500
             }
\ No newline at end of file
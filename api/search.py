@@ -5,47 +5,193 @@ Endpoint: /api/search
 import os
 import sys
 import json
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
 from http.server import BaseHTTPRequestHandler
 
+import numpy as np
+
 # Memory optimization
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 # Add backend directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
+# Fast JSON encoding when orjson is installed, stdlib json otherwise
+try:
+    import orjson
+    
+    def _dumps(obj):
+        return orjson.dumps(obj)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+    
+    _loads = json.loads
+
 # Import with fallback handling
 try:
     from document_processor import DocumentProcessor
     from query_parser import QueryParser
-    
-    # Try to import optimized vector search
-    try:
-        from vector_search import VectorSearch
-        SEARCH_TYPE = "Optimized semantic search with all-MiniLM-L6-v2"
-    except ImportError:
-        try:
-            from enhanced_vector_search import EnhancedVectorSearch as VectorSearch
-            SEARCH_TYPE = "Enhanced TF-IDF search"
-        except ImportError:
-            from simple_vector_search import SimpleVectorSearch as VectorSearch
-            SEARCH_TYPE = "Simple text search"
-            
     PROCESSING_AVAILABLE = True
+    
+    # The parser is stateless, so one instance serves every request
+    _PARSER = QueryParser()
 except ImportError as e:
     print(f"Import error in search.py: {e}")
     DocumentProcessor = None
     QueryParser = None
-    VectorSearch = None
-    SEARCH_TYPE = "Search unavailable"
     PROCESSING_AVAILABLE = False
+    _PARSER = None
+
+@functools.lru_cache(maxsize=1024)
+def _parse_query_cached(query):
+    return _PARSER.parse_query(query)
+
+def _parse_query(query):
+    """Parse a query, reusing the result for repeated query strings"""
+    # Copy so callers can't mutate the cached dict
+    return dict(_parse_query_cached(query))
+
+# Search backends pull in heavy dependencies (faiss, sentence-transformers,
+# scikit-learn), so they are imported on first use rather than at cold start
+VectorSearch = None
+SEARCH_TYPE = "Not loaded" if PROCESSING_AVAILABLE else "Search unavailable"
+_import_lock = threading.Lock()
+
+def _get_vector_search_class():
+    """Resolve the best available vector search backend on first use"""
+    global VectorSearch, SEARCH_TYPE
+    if VectorSearch is None:
+        with _import_lock:
+            if VectorSearch is None:
+                # Try to import vector search with fallbacks
+                try:
+                    from vector_search import VectorSearch as search_class
+                    search_type = "Optimized semantic search with all-MiniLM-L6-v2"
+                except ImportError:
+                    try:
+                        from enhanced_vector_search import EnhancedVectorSearch as search_class
+                        search_type = "Enhanced TF-IDF search"
+                    except ImportError:
+                        from simple_vector_search import SimpleVectorSearch as search_class
+                        search_type = "Simple text search"
+                SEARCH_TYPE = search_type
+                VectorSearch = search_class
+    return VectorSearch
 
-def semantic_search(query: str, document_chunks: list = None) -> dict:
+# Process-level LRU cache of chunked and indexed documents, keyed by content
+# hash, so repeat searches against a document skip chunking and index builds
+INDEX_CACHE_SIZE = 32
+_index_cache = OrderedDict()
+_index_lock = threading.RLock()
+
+def _hash_document(document_text: str) -> str:
+    """Return the content hash used as the index cache key."""
+    return hashlib.blake2b(document_text.encode('utf-8', errors='ignore'), digest_size=16).hexdigest()
+
+def _build_document_index(document_text: str) -> dict:
+    """Chunk a document and build a search index over the chunks."""
+    if PROCESSING_AVAILABLE:
+        processor = DocumentProcessor()
+        chunks = processor.chunk_text(document_text)
+    else:
+        # Simple fallback chunking
+        chunks = [document_text[i:i+1000] for i in range(0, len(document_text), 1000)]
+    
+    vector_search = None
+    index_error = None
+    if PROCESSING_AVAILABLE and chunks:
+        try:
+            vector_search = _get_vector_search_class()()
+            vector_search.build_index(chunks)
+        except Exception as e:
+            # Remember the failure so cached documents go straight to the fallback
+            vector_search = None
+            index_error = str(e)
+    
+    return {
+        'chunks': chunks,
+        'lowered_chunks': _lower_chunks(chunks),
+        'vector_search': vector_search,
+        'index_error': index_error
+    }
+
+def _lower_chunks(chunks: list) -> np.ndarray:
+    """Lowercase chunks once into a NumPy string array for keyword scoring."""
+    return np.array([chunk.lower() for chunk in chunks], dtype=str)
+
+def _keyword_search(query: str, chunks: list, lowered_chunks: np.ndarray, k: int = 3) -> list:
+    """
+    Rank chunks by how many query words they contain.
+    
+    Args:
+        query: Search query string
+        chunks: Original document chunks
+        lowered_chunks: Lowercased chunks as a NumPy string array
+        k: Number of top results to return
+        
+    Returns:
+        Up to k matching chunks, best first, earlier chunks first on ties
+    """
+    chunk_count = len(chunks)
+    scores = np.zeros(chunk_count, dtype=np.int32)
+    for word in query.lower().split():
+        scores += np.char.find(lowered_chunks, word) >= 0
+    
+    matches = np.flatnonzero(scores)
+    # Rank by score, then by position so earlier chunks win ties
+    rank = scores[matches].astype(np.int64) * chunk_count - matches
+    if len(matches) > k:
+        # Select the top k in linear time, then order only those
+        top = np.argpartition(-rank, k - 1)[:k]
+        matches, rank = matches[top], rank[top]
+    return [chunks[i] for i in matches[np.argsort(-rank)]]
+
+def get_document_index(document_text: str) -> dict:
+    """
+    Return the cached index for a document, building it on a miss.
+    
+    Args:
+        document_text: Full document text
+        
+    Returns:
+        Dictionary with chunks, lowered_chunks, vector_search and index_error
+    """
+    key = _hash_document(document_text)
+    
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached is not None:
+            _index_cache.move_to_end(key)
+            return cached
+    
+    # Build outside the lock so other documents are not blocked
+    entry = _build_document_index(document_text)
+    
+    with _index_lock:
+        _index_cache[key] = entry
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    
+    return entry
+
+def semantic_search(query: str, document_chunks: list = None, vector_search=None,
+                    index_error: str = None, lowered_chunks: np.ndarray = None) -> dict:
     """
     Perform semantic search with memory optimization.
     
     Args:
         query: Search query string
         document_chunks: List of document chunks to search in
+        vector_search: Index already built over document_chunks, built here when omitted
+        index_error: Reason an earlier index build failed, to skip straight to the fallback
+        lowered_chunks: Lowercased chunks for the keyword fallback, computed here when omitted
         
     Returns:
         Dictionary with search results
@@ -63,11 +209,15 @@ def semantic_search(query: str, document_chunks: list = None) -> dict:
         }
     
     try:
-        # Use optimized vector search with lazy loading
-        vector_search = VectorSearch()
+        if index_error:
+            raise Exception(index_error)
         
-        # Build index with memory optimization
-        vector_search.build_index(document_chunks)
+        if vector_search is None:
+            # Use optimized vector search with lazy loading
+            vector_search = _get_vector_search_class()()
+            
+            # Build index with memory optimization
+            vector_search.build_index(document_chunks)
         
         # Perform search
         results = vector_search.search(query, k=3)
@@ -81,18 +231,9 @@ def semantic_search(query: str, document_chunks: list = None) -> dict:
         
     except Exception as e:
         # Fallback to simple text search
-        query_words = query.lower().split()
-        scored_chunks = []
-        
-        for chunk in document_chunks:
-            chunk_lower = chunk.lower()
-            score = sum(1 for word in query_words if word in chunk_lower)
-            if score > 0:
-                scored_chunks.append((score, chunk))
-        
-        # Sort by relevance score and take top 3
-        scored_chunks.sort(reverse=True, key=lambda x: x[0])
-        results = [chunk for _, chunk in scored_chunks[:3]]
+        if lowered_chunks is None:
+            lowered_chunks = _lower_chunks(document_chunks)
+        results = _keyword_search(query, document_chunks, lowered_chunks, k=3)
         
         return {
             "query": query,
@@ -102,62 +243,84 @@ def semantic_search(query: str, document_chunks: list = None) -> dict:
             "fallback_reason": str(e)
         }
 
+# Responses larger than this are written in WRITE_CHUNK_SIZE slices
+LARGE_RESPONSE_SIZE = 64 * 1024
+WRITE_CHUNK_SIZE = 16 * 1024
+
 class handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        """Handle document search requests"""
-        # Set CORS headers
-        self.send_response(200)
+    def _send_cors_headers(self):
+        """Add the CORS headers shared by every response"""
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+    
+    def _send_json(self, status, payload):
+        """Send a JSON response with CORS headers and an explicit Content-Length"""
+        body = payload if isinstance(payload, bytes) else _dumps(payload)
+        self.send_response(status)
+        self._send_cors_headers()
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
         
+        if len(body) <= LARGE_RESPONSE_SIZE:
+            self.wfile.write(body)
+            return
+        view = memoryview(body)
+        for offset in range(0, len(body), WRITE_CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + WRITE_CHUNK_SIZE])
+    
+    def do_POST(self):
+        """Handle document search requests"""
         try:
             # Read request data
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             
             # Parse JSON data
-            data = json.loads(post_data.decode('utf-8'))
+            data = _loads(post_data)
             query = data.get('query', '')
             document_text = data.get('document_text', '')
             
             if not query:
-                response = {
+                self._send_json(400, {
                     'error': 'No search query provided',
                     'status': 400
-                }
-                self.wfile.write(json.dumps(response).encode())
+                })
                 return
             
             if not document_text:
-                response = {
+                self._send_json(400, {
                     'error': 'No document content provided',
                     'status': 400
-                }
-                self.wfile.write(json.dumps(response).encode())
+                })
                 return
             
-            # Process document into chunks for search
-            if PROCESSING_AVAILABLE:
-                processor = DocumentProcessor()
-                chunks = processor.chunk_text(document_text)
-            else:
-                # Simple fallback chunking
-                chunks = [document_text[i:i+1000] for i in range(0, len(document_text), 1000)]
+            # Chunk and index the document, reusing a cached result
+            document_index = get_document_index(document_text)
+            chunks = document_index['chunks']
+            
+            if not chunks:
+                # Nothing survived chunking, so there is nothing to index or match
+                self._send_json(400, {
+                    'error': 'Document has no searchable content',
+                    'status': 400
+                })
+                return
             
             # Parse query if parser is available
             parsed_query = None
-            if PROCESSING_AVAILABLE and QueryParser:
+            if PROCESSING_AVAILABLE and _PARSER:
                 try:
-                    parser = QueryParser()
-                    parsed_query = parser.parse_query(query)
+                    parsed_query = _parse_query(query)
                 except:
                     parsed_query = {"original": query}
             
             # Perform search
-            search_results = semantic_search(query, chunks)
+            search_results = semantic_search(
+                query, chunks, document_index['vector_search'], document_index['index_error'],
+                document_index['lowered_chunks']
+            )
             
             # Format response according to problem statement
             response = {
@@ -175,19 +338,17 @@ class handler(BaseHTTPRequestHandler):
             if "fallback_reason" in search_results:
                 response["search_metadata"]["fallback_reason"] = search_results["fallback_reason"]
             
-            self.wfile.write(json.dumps(response).encode())
+            self._send_json(200, response)
             
         except Exception as e:
-            error_response = {
+            self._send_json(500, {
                 'error': f'Search processing failed: {str(e)}',
                 'status': 500
-            }
-            self.wfile.write(json.dumps(error_response).encode())
+            })
     
     def do_OPTIONS(self):
         """Handle preflight CORS requests"""
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
\ No newline at end of file
+        self._send_cors_headers()
+        self.send_header('Content-Length', '0')
+        self.end_headers()
@@ -3,10 +3,13 @@ Vercel serverless function for document upload and processing.
 Endpoint: /api/upload
 """
 import os
+import re
 import sys
-import tempfile
+import hashlib
+import threading
 import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from http.server import BaseHTTPRequestHandler
 import json
@@ -16,91 +19,183 @@ import base64
 # Add backend directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
+# Fast JSON encoding when orjson is installed, stdlib json otherwise
 try:
-    from document_processor import DocumentProcessor
-    from dependency_checker import DependencyChecker
+    import orjson
     
-    # Try to import vector search with fallbacks
-    try:
-        from vector_search import VectorSearch
-        SEARCH_TYPE = "Advanced semantic search"
-    except ImportError:
-        try:
-            from enhanced_vector_search import EnhancedVectorSearch as VectorSearch
-            SEARCH_TYPE = "Enhanced TF-IDF search"
-        except ImportError:
-            from simple_vector_search import SimpleVectorSearch as VectorSearch
-            SEARCH_TYPE = "Simple text search"
-            
+    def _dumps(obj):
+        return orjson.dumps(obj)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+    
+    _loads = json.loads
+
+try:
+    from document_processor import DocumentProcessor
     PROCESSING_AVAILABLE = True
 except ImportError as e:
     print(f"Import error in upload.py: {e}")
     DocumentProcessor = None
-    DependencyChecker = None
-    VectorSearch = None
-    SEARCH_TYPE = "Processing unavailable"
     PROCESSING_AVAILABLE = False
 
+# Search backends pull in heavy dependencies (faiss, sentence-transformers,
+# scikit-learn), so they are imported on first use rather than at cold start
+VectorSearch = None
+SEARCH_TYPE = "Not loaded" if PROCESSING_AVAILABLE else "Processing unavailable"
+_import_lock = threading.Lock()
+
+def _get_vector_search_class():
+    """Resolve the best available vector search backend on first use"""
+    global VectorSearch, SEARCH_TYPE
+    if VectorSearch is None:
+        with _import_lock:
+            if VectorSearch is None:
+                # Try to import vector search with fallbacks
+                try:
+                    from vector_search import VectorSearch as search_class
+                    search_type = "Advanced semantic search"
+                except ImportError:
+                    try:
+                        from enhanced_vector_search import EnhancedVectorSearch as search_class
+                        search_type = "Enhanced TF-IDF search"
+                    except ImportError:
+                        from simple_vector_search import SimpleVectorSearch as search_class
+                        search_type = "Simple text search"
+                SEARCH_TYPE = search_type
+                VectorSearch = search_class
+    return VectorSearch
+
+# Process-level LRU cache of processed uploads, keyed by file extension and
+# content hash, so re-uploading a file skips extraction and index builds
+UPLOAD_CACHE_SIZE = 32
+_upload_cache = OrderedDict()
+_upload_lock = threading.RLock()
+
+_WORD_RE = re.compile(r'\S+')
+
+def _count_words(text):
+    """Count whitespace-separated words without building a token list"""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+def _chunk_distribution(chunks):
+    """Bucket chunks by length in a single pass"""
+    small = medium = large = 0
+    for chunk in chunks:
+        length = len(chunk)
+        if length < 500:
+            small += 1
+        elif length < 1500:
+            medium += 1
+        else:
+            large += 1
+    return {
+        'small_chunks': small,
+        'medium_chunks': medium,
+        'large_chunks': large
+    }
+
+def _process_file(file_bytes, file_name):
+    """Extract, chunk and index an uploaded file held in memory"""
+    processor = DocumentProcessor()
+    text_content = processor.extract_text_from_bytes(file_bytes, file_name)
+    chunks = processor.chunk_text(text_content)
+    
+    # Initialize vector search for document
+    search_ready = False
+    try:
+        search_class = _get_vector_search_class()
+        if len(chunks) > 0:
+            vector_search = search_class()
+            # Every backend indexes all chunks in one batched call
+            vector_search.build_index(chunks)
+            search_ready = True
+    except Exception as search_error:
+        print(f"Vector search setup warning: {search_error}")
+        search_ready = False
+    
+    return {
+        'text_content': text_content,
+        'chunks': chunks,
+        'search_ready': search_ready,
+        'word_count': _count_words(text_content),
+        'chunk_distribution': _chunk_distribution(chunks)
+    }
+
+# Responses larger than this are written in WRITE_CHUNK_SIZE slices
+LARGE_RESPONSE_SIZE = 64 * 1024
+WRITE_CHUNK_SIZE = 16 * 1024
+
 class handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        """Handle document upload and processing"""
-        # Set CORS headers
+    def _send_cors_headers(self):
+        """Add the CORS headers shared by every response"""
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, X-File-Name, X-Document-Name')
+    
+    def _send_json(self, status, payload):
+        """Send a JSON response with CORS headers and an explicit Content-Length"""
+        body = payload if isinstance(payload, bytes) else _dumps(payload)
+        self.send_response(status)
+        self._send_cors_headers()
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
         
+        if len(body) <= LARGE_RESPONSE_SIZE:
+            self.wfile.write(body)
+            return
+        view = memoryview(body)
+        for offset in range(0, len(body), WRITE_CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + WRITE_CHUNK_SIZE])
+    
+    def do_POST(self):
+        """Handle document upload and processing"""
         try:
             if not PROCESSING_AVAILABLE:
-                self.send_response(503)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {
+                self._send_json(503, {
                     'error': 'Document processing not available',
                     'message': 'Required dependencies missing',
                     'status': 503
-                }
-                self.wfile.write(json.dumps(response).encode())
+                })
                 return
                 
             # Read request data
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             
-            # Parse JSON or form data
-            try:
-                data = json.loads(post_data.decode('utf-8'))
-            except json.JSONDecodeError:
-                self.send_response(400)
-                self.send_header('Content-type', 'application/json') 
-                self.end_headers()
-                response = {'error': 'Invalid JSON data', 'status': 400}
-                self.wfile.write(json.dumps(response).encode())
-                return
+            # Raw uploads carry the file itself as the body, JSON uploads carry it base64 encoded
+            if self.headers.get('Content-Type', '').startswith('application/octet-stream'):
+                data = {
+                    'file_bytes': post_data,
+                    'file_name': self.headers.get('X-File-Name') or 'uploaded_document.txt',
+                    'document_name': self.headers.get('X-Document-Name')
+                }
+            else:
+                try:
+                    data = _loads(post_data)
+                except json.JSONDecodeError:
+                    self._send_json(400, {'error': 'Invalid JSON data', 'status': 400})
+                    return
             
             # Process the upload
             response = self.handle_upload(data)
             
-            self.send_response(200 if response.get('success') else 500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self._send_json(200 if response.get('success') else response.get('status', 500), response)
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            error_response = {
+            self._send_json(500, {
                 'error': f'Upload processing failed: {str(e)}',
                 'status': 500
-            }
-            self.wfile.write(json.dumps(error_response).encode())
+            })
     
     def do_OPTIONS(self):
         """Handle preflight CORS requests"""
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self._send_cors_headers()
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def handle_upload(self, data):
@@ -110,104 +205,92 @@ class handler(BaseHTTPRequestHandler):
         
         try:
             # Extract file data from request
+            file_bytes = data.get('file_bytes')  # Raw body of an octet-stream upload
             file_content = data.get('file_content', '')  # Base64 encoded file
             file_name = data.get('file_name', 'uploaded_document.txt')
             document_name = data.get('document_name') or file_name
             
-            if not file_content:
+            if not file_bytes and not file_content:
                 return {
                     'error': 'No file content provided',
                     'status': 400
                 }
             
             # Decode base64 file content if provided
-            try:
-                if file_content.startswith('data:'):
-                    # Remove data URL prefix
-                    file_content = file_content.split(',')[1]
-                
-                file_bytes = base64.b64decode(file_content)
-                file_size = len(file_bytes)
-                
-            except Exception as decode_error:
-                # Fallback: treat as plain text
-                file_bytes = file_content.encode('utf-8')
-                file_size = len(file_bytes)
+            if not file_bytes:
+                try:
+                    if file_content.startswith('data:'):
+                        # Remove data URL prefix
+                        file_content = file_content.split(',')[1]
+                    
+                    file_bytes = base64.b64decode(file_content)
+                    
+                except Exception as decode_error:
+                    # Fallback: treat as plain text
+                    file_bytes = file_content.encode('utf-8')
+            file_size = len(file_bytes)
             
-            # Create temporary file with proper extension
             file_extension = os.path.splitext(file_name)[1] or '.txt'
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-                tmp_file.write(file_bytes)
-                tmp_file_path = tmp_file.name
-            
-            try:
-                # Process document using existing module
-                processor = DocumentProcessor()
-                text_content = processor.extract_text(tmp_file_path)
-                chunks = processor.chunk_text(text_content)
-                
-                # Initialize vector search for document
-                search_ready = False
-                try:
-                    if VectorSearch and len(chunks) > 0:
-                        vector_search = VectorSearch()
-                        # Handle different vector search interfaces
-                        if hasattr(vector_search, 'build_index'):
-                            vector_search.build_index(chunks)
-                        elif hasattr(vector_search, 'add_documents'):
-                            vector_search.add_documents(chunks)
-                        else:
-                            # Simple search fallback
-                            vector_search.documents = chunks
-                        search_ready = True
-                except Exception as search_error:
-                    print(f"Vector search setup warning: {search_error}")
-                    search_ready = False
-                
-                # Calculate processing statistics
-                processing_time = time.time() - start_time
-                avg_chunk_size = len(text_content) // len(chunks) if chunks else 0
-                
-                # Content preview for response
-                content_preview = text_content[:500] + '...' if len(text_content) > 500 else text_content
-                
-                # Success response
-                response = {
-                    'success': True,
-                    'document_id': document_id,
-                    'document_name': document_name,
-                    'timestamp': datetime.utcnow().isoformat() + 'Z',
-                    'processing_time': f'{processing_time:.3f}s',
-                    'document_analysis': {
-                        'content_preview': content_preview,
-                        'character_count': len(text_content),
-                        'chunk_count': len(chunks),
-                        'average_chunk_size': avg_chunk_size,
-                        'file_size': file_size
-                    },
-                    'capabilities': {
-                        'search_ready': search_ready,
-                        'search_type': SEARCH_TYPE,
-                        'vector_search_available': VectorSearch is not None
-                    },
-                    'statistics': {
-                        'total_words': len(text_content.split()),
-                        'estimated_reading_time': f'{len(text_content.split()) // 200 + 1} min',
-                        'chunk_distribution': {
-                            'small_chunks': len([c for c in chunks if len(c) < 500]),
-                            'medium_chunks': len([c for c in chunks if 500 <= len(c) < 1500]),
-                            'large_chunks': len([c for c in chunks if len(c) >= 1500])
-                        }
-                    },
-                    'message': 'Document uploaded and processed successfully'
-                }
-                
-                return response
-                
-            finally:
-                # Clean up temporary file
-                os.unlink(tmp_file_path)
+            cache_key = f"{file_extension}:{hashlib.blake2b(file_bytes, digest_size=16).hexdigest()}"
+            
+            with _upload_lock:
+                processed = _upload_cache.get(cache_key)
+                if processed is not None:
+                    _upload_cache.move_to_end(cache_key)
+            
+            if processed is None:
+                # Extract straight from the decoded bytes, no temporary file
+                processed = _process_file(file_bytes, file_name)
                 
+                with _upload_lock:
+                    _upload_cache[cache_key] = processed
+                    while len(_upload_cache) > UPLOAD_CACHE_SIZE:
+                        _upload_cache.popitem(last=False)
+            
+            text_content = processed['text_content']
+            chunks = processed['chunks']
+            search_ready = processed['search_ready']
+            word_count = processed['word_count']
+            
+            text_length = len(text_content)
+            chunk_count = len(chunks)
+            
+            # Calculate processing statistics
+            processing_time = time.time() - start_time
+            avg_chunk_size = text_length // chunk_count if chunk_count else 0
+            
+            # Content preview for response
+            content_preview = text_content[:500] + '...' if text_length > 500 else text_content
+            
+            # Success response
+            response = {
+                'success': True,
+                'document_id': document_id,
+                'document_name': document_name,
+                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'processing_time': f'{processing_time:.3f}s',
+                'document_analysis': {
+                    'content_preview': content_preview,
+                    'character_count': text_length,
+                    'chunk_count': chunk_count,
+                    'average_chunk_size': avg_chunk_size,
+                    'file_size': file_size
+                },
+                'capabilities': {
+                    'search_ready': search_ready,
+                    'search_type': SEARCH_TYPE,
+                    'vector_search_available': VectorSearch is not None
+                },
+                'statistics': {
+                    'total_words': word_count,
+                    'estimated_reading_time': f'{word_count // 200 + 1} min',
+                    'chunk_distribution': dict(processed['chunk_distribution'])
+                },
+                'message': 'Document uploaded and processed successfully'
+            }
+            
+            return response
+            
         except Exception as e:
             processing_time = time.time() - start_time
             return {
@@ -75,6 +75,9 @@ except ImportError:
 class MockApp:
     def __init__(self):
         self.documents = {}
+        # Stateless helpers shared by every request
+        self.query_parser = QueryParser() if QUERY_PARSER_AVAILABLE else None
+        self.document_processor = DocumentProcessor() if DOCUMENT_PROCESSOR_AVAILABLE else None
         
     def root(self):
         return {
@@ -106,7 +109,7 @@ class MockApp:
         if DOCUMENT_PROCESSOR_AVAILABLE:
             # Use real processor if available
             try:
-                processor = DocumentProcessor()
+                processor = self.document_processor
                 with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1] or '.txt') as tmp_file:
                     tmp_file.write(file_content)
                     tmp_file_path = tmp_file.name
@@ -130,6 +133,8 @@ class MockApp:
             "name": filename,
             "text_content": text_content,
             "chunks": chunks,
+            # Lowercased once here so keyword search does not redo it per query
+            "chunks_lower": [chunk.lower() for chunk in chunks],
             "upload_time": datetime.utcnow().isoformat() + "Z",
             "file_size": len(file_content)
         }
@@ -164,8 +169,8 @@ class MockApp:
         query_words = query.lower().split()
         scored_chunks = []
         
-        for chunk in chunks:
-            score = sum(1 for word in query_words if word in chunk.lower())
+        for chunk, chunk_lower in zip(chunks, doc_data["chunks_lower"]):
+            score = sum(1 for word in query_words if word in chunk_lower)
             if score > 0:
                 scored_chunks.append((score, chunk))
         
@@ -193,8 +198,7 @@ class MockApp:
         parsed_query = {}
         if QUERY_PARSER_AVAILABLE:
             try:
-                parser = QueryParser()
-                parsed_query = parser.parse_query(query)
+                parsed_query = self.query_parser.parse_query(query)
             except Exception as e:
                 print(f"Parser error: {e}")
         
@@ -1,8 +1,13 @@
 import PyPDF2
+import io
 import re
 import email
 import os
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple, Union
+# Patterns used to clean extracted text
+_WHITESPACE_RE = re.compile(r'\s+')
+_JOINED_WORDS_RE = re.compile(r'([a-z])([A-Z])')
+
 try:
     from docx import Document
     DOCX_AVAILABLE = True
@@ -81,42 +86,86 @@ class DocumentProcessor:
         except Exception as e:
             raise Exception(f"Error extracting text from {file_type} file: {str(e)}")
     
-    def _extract_pdf_text(self, pdf_path: str) -> str:
-        """Extract text content from a PDF file."""
-        try:
-            text_content = ""
+    def extract_text_from_bytes(self, content: bytes, file_name: str) -> str:
+        """
+        Extract text from document content already in memory, without a temporary file.
+        
+        Args:
+            content: Raw file content
+            file_name: Original file name, used to detect the format
             
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Check if PDF is encrypted
-                if pdf_reader.is_encrypted:
-                    raise Exception("PDF is encrypted and cannot be processed")
-                
-                # Extract text from all pages
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content += page_text + "\n"
-                
-                if not text_content.strip():
-                    raise Exception("No text content found in PDF")
-                
-                return self._clean_text(text_content)
+        Returns:
+            Cleaned text, identical to extract_text() on the same file
+        """
+        file_type = self.detect_file_type(file_name)
+        
+        try:
+            if file_type == 'pdf':
+                return self._extract_pdf_text(io.BytesIO(content))
+            elif file_type == 'docx':
+                return self._extract_docx_text(io.BytesIO(content))
+            elif file_type == 'email':
+                return self._parse_email_text(content.decode('utf-8', errors='ignore'))
+            else:
+                # Treat as plain text
+                return self._clean_text(content.decode('utf-8', errors='ignore'))
                 
+        except Exception as e:
+            raise Exception(f"Error extracting text from {file_type} file: {str(e)}")
+    
+    def process_text(self, text: str) -> str:
+        """
+        Clean plain text that is already in memory, without a temporary file.
+        
+        Args:
+            text: Raw document text
+            
+        Returns:
+            Cleaned text
+        """
+        return self._clean_text(text)
+    
+    def _extract_pdf_text(self, pdf_source) -> str:
+        """Extract text content from a PDF file path or binary stream."""
+        try:
+            pdf_reader = PyPDF2.PdfReader(pdf_source)
+            
+            # Check if PDF is encrypted
+            if pdf_reader.is_encrypted:
+                raise Exception("PDF is encrypted and cannot be processed")
+            
+            # Extract text from all pages
+            return self.join_pdf_pages([page.extract_text() for page in pdf_reader.pages])
+            
         except PyPDF2.errors.PdfReadError as e:
             raise Exception(f"Error reading PDF file: {str(e)}")
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
     
-    def _extract_docx_text(self, docx_path: str) -> str:
-        """Extract text content from a Word document."""
+    def join_pdf_pages(self, page_texts: List[str]) -> str:
+        """
+        Combine per-page PDF text into cleaned document text.
+        
+        Args:
+            page_texts: Extracted text of each page, in page order
+            
+        Returns:
+            Cleaned text
+        """
+        text_content = "".join(page_text + "\n" for page_text in page_texts if page_text)
+        
+        if not text_content.strip():
+            raise Exception("No text content found in PDF")
+        
+        return self._clean_text(text_content)
+    
+    def _extract_docx_text(self, docx_source) -> str:
+        """Extract text content from a Word document path or binary stream."""
         if not DOCX_AVAILABLE:
             raise Exception("Word document processing not available. Please install python-docx.")
         
         try:
-            doc = Document(docx_path)
+            doc = Document(docx_source)
             text = ""
             
             # Extract text from paragraphs
@@ -141,48 +190,52 @@ class DocumentProcessor:
             with open(email_path, 'r', encoding='utf-8', errors='ignore') as file:
                 content = file.read()
             
-            # Try to parse as email
-            try:
-                msg = email.message_from_string(content)
-                
-                # Extract email metadata
-                subject = msg.get('Subject', '')
-                sender = msg.get('From', '')
-                recipient = msg.get('To', '')
-                date = msg.get('Date', '')
+            return self._parse_email_text(content)
                 
-                # Extract body
-                body = ""
-                if msg.is_multipart():
-                    for part in msg.walk():
-                        if part.get_content_type() == "text/plain":
-                            payload = part.get_payload(decode=True)
-                            if payload:
-                                body += payload.decode('utf-8', errors='ignore')
+        except Exception as e:
+            raise Exception(f"Error extracting text from email: {str(e)}")
+    
+    def _parse_email_text(self, content: str) -> str:
+        """Extract subject, addresses and body text from raw email content."""
+        # Try to parse as email
+        try:
+            msg = email.message_from_string(content)
+            
+            # Extract email metadata
+            subject = msg.get('Subject', '')
+            sender = msg.get('From', '')
+            recipient = msg.get('To', '')
+            date = msg.get('Date', '')
+            
+            # Extract body
+            body = ""
+            if msg.is_multipart():
+                for part in msg.walk():
+                    if part.get_content_type() == "text/plain":
+                        payload = part.get_payload(decode=True)
+                        if payload:
+                            body += payload.decode('utf-8', errors='ignore')
+            else:
+                payload = msg.get_payload(decode=True)
+                if payload:
+                    body = payload.decode('utf-8', errors='ignore')
                 else:
-                    payload = msg.get_payload(decode=True)
-                    if payload:
-                        body = payload.decode('utf-8', errors='ignore')
-                    else:
-                        body = str(msg.get_payload())
-                
-                # Combine all content
-                email_text = f"""Subject: {subject}
+                    body = str(msg.get_payload())
+            
+            # Combine all content
+            email_text = f"""Subject: {subject}
 From: {sender}
 To: {recipient}
 Date: {date}
 
 Body:
 {body}"""
-                
-                return self._clean_text(email_text)
-                
-            except Exception:
-                # If email parsing fails, return as plain text
-                return self._clean_text(content)
-                
-        except Exception as e:
-            raise Exception(f"Error extracting text from email: {str(e)}")
+            
+            return self._clean_text(email_text)
+            
+        except Exception:
+            # If email parsing fails, return as plain text
+            return self._clean_text(content)
     
     def _clean_text(self, text: str) -> str:
         """
@@ -194,18 +247,13 @@ Body:
         Returns:
             Cleaned text
         """
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove page numbers and headers/footers (basic patterns)
-        text = re.sub(r'\n\s*\d+\s*\n', '\n', text)
-        text = re.sub(r'\n\s*Page\s+\d+.*?\n', '\n', text, flags=re.IGNORECASE)
+        # Remove excessive whitespace. This also removes every newline, so the
+        # newline-anchored header/footer and blank-line patterns never matched
+        # and are no longer run.
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # Fix common OCR issues
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)  # Add space between joined words
-        
-        # Remove extra newlines
-        text = re.sub(r'\n+', '\n', text)
+        text = _JOINED_WORDS_RE.sub(r'\1 \2', text)  # Add space between joined words
         
         return text.strip()
     
@@ -225,7 +273,7 @@ Body:
             return []
         
         # First, try to split by paragraphs
-        paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+        paragraphs = [p for p in map(str.strip, text.split('\n')) if p]
         
         chunks = []
         current_chunk = ""
@@ -251,7 +299,8 @@ Body:
         if not chunks:
             chunks = self._fixed_size_chunking(text, chunk_size, overlap)
         
-        return [chunk for chunk in chunks if len(chunk.strip()) > 50]  # Filter out very short chunks
+        # Chunks are already stripped; filter out very short ones
+        return [chunk for chunk in chunks if len(chunk) > 50]
     
     def _fixed_size_chunking(self, text: str, chunk_size: int, overlap: int) -> List[str]:
         """
@@ -285,3 +334,84 @@ Body:
             start = end - overlap if overlap > 0 else end
         
         return chunks
+
+
+def extract_and_chunk(file_path: str, chunk_size: int = 1000, overlap: int = 200) -> Tuple[str, List[str]]:
+    """
+    Extract text from a file and split it into chunks.
+    
+    Module-level so it can be dispatched to a process pool.
+    
+    Args:
+        file_path: Path to the document
+        chunk_size: Maximum size of each chunk
+        overlap: Number of characters to overlap between chunks
+        
+    Returns:
+        Tuple of (extracted text, list of chunks)
+    """
+    processor = DocumentProcessor()
+    text_content = processor.extract_text(file_path)
+    return text_content, processor.chunk_text(text_content, chunk_size, overlap)
+
+
+def extract_and_chunk_bytes(content: bytes, file_name: str, chunk_size: int = 1000,
+                            overlap: int = 200) -> Tuple[str, List[str]]:
+    """
+    Extract text from document content already in memory and split it into chunks.
+    
+    Module-level so it can be dispatched to a process pool.
+    
+    Args:
+        content: Raw file content
+        file_name: Original file name, used to detect the format
+        chunk_size: Maximum size of each chunk
+        overlap: Number of characters to overlap between chunks
+        
+    Returns:
+        Tuple of (extracted text, list of chunks)
+    """
+    processor = DocumentProcessor()
+    text_content = processor.extract_text_from_bytes(content, file_name)
+    return text_content, processor.chunk_text(text_content, chunk_size, overlap)
+
+
+def _open_pdf(pdf_source: Union[str, bytes]) -> PyPDF2.PdfReader:
+    """Open a PDF from a file path or from its content in memory."""
+    if isinstance(pdf_source, bytes):
+        pdf_source = io.BytesIO(pdf_source)
+    return PyPDF2.PdfReader(pdf_source)
+
+
+def count_pdf_pages(pdf_source: Union[str, bytes]) -> int:
+    """
+    Count the pages of a PDF, rejecting encrypted files.
+    
+    Args:
+        pdf_source: Path to the PDF, or its content
+        
+    Returns:
+        Number of pages
+    """
+    pdf_reader = _open_pdf(pdf_source)
+    if pdf_reader.is_encrypted:
+        raise Exception("PDF is encrypted and cannot be processed")
+    return len(pdf_reader.pages)
+
+
+def extract_pdf_pages(pdf_source: Union[str, bytes], start: int, stop: int) -> List[str]:
+    """
+    Extract the text of a range of PDF pages.
+    
+    Module-level so page ranges of one PDF can be extracted in parallel worker processes.
+    
+    Args:
+        pdf_source: Path to the PDF, or its content
+        start: First page to extract
+        stop: Page after the last page to extract
+        
+    Returns:
+        Extracted text of each page in the range
+    """
+    pdf_reader = _open_pdf(pdf_source)
+    return [pdf_reader.pages[page_num].extract_text() for page_num in range(start, stop)]
@@ -0,0 +1,98 @@
+"""
+Dynamic batching of query embeddings for the async API.
+Queries from concurrent requests that arrive within a short window are encoded
+together in one model call, and each caller receives its own embedding.
+"""
+import asyncio
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent query encodings into single batched encoder calls."""
+
+    def __init__(self, encode_fn: Callable[[List[str]], Any],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Initialize the batcher.
+
+        Args:
+            encode_fn: Blocking function mapping a list of queries to an array of embeddings
+            max_batch_size: Maximum number of queries encoded in one call
+            max_wait_ms: How long to wait for more queries after the first one arrives
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def encode(self, query: str) -> Any:
+        """
+        Encode a single query, batched with any concurrent callers.
+
+        Args:
+            query: Query string
+
+        Returns:
+            Embedding for the query
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues and tasks are bound to the loop that created them
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Drain the queue into batches and dispatch them to the encoder."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                queries = [query for query, _ in batch]
+                # Run the forward pass off the event loop
+                embeddings = await loop.run_in_executor(None, self.encode_fn, queries)
+                if len(embeddings) != len(batch):
+                    raise ValueError(f"Encoder returned {len(embeddings)} embeddings for {len(batch)} queries")
+
+                for i, (_, future) in enumerate(batch):
+                    if not future.done():
+                        future.set_result(embeddings[i])
+            except Exception as e:
+                # Fail this batch and keep serving later queries
+                self._fail(batch, e)
+            except BaseException:
+                # The worker is going away (e.g. cancelled); nothing would resolve
+                # the queued futures, so fail them instead of leaving callers waiting
+                error = RuntimeError("Embedding batcher stopped")
+                self._fail(batch, error)
+                while not self._queue.empty():
+                    self._fail([self._queue.get_nowait()], error)
+                raise
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future]], error: BaseException) -> None:
+        """Set the error on every unresolved future in the batch."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
@@ -1,9 +1,45 @@
+import heapq
 import numpy as np
 import re
 from typing import List, Tuple, Dict
 from collections import Counter
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.metrics.pairwise import linear_kernel
+
+# Common medical abbreviations and the words they expand to
+_MEDICAL_EXPANSIONS = {
+    'pts': 'patients', 'pt': 'patient', 'dx': 'diagnosis', 'tx': 'treatment',
+    'hx': 'history', 'sx': 'surgery', 'rx': 'prescription', 'yr': 'year',
+    'mo': 'month', 'wk': 'week', 'm': 'male', 'f': 'female',
+    'hosp': 'hospital', 'clinic': 'clinic', 'med': 'medical'
+}
+
+# Medical terms rewritten to tokens shared with their related concepts
+_MEDICAL_NORMALIZATIONS = {
+    'knee surgery': 'knee_surgery orthopedic_procedure',
+    'hip surgery': 'hip_surgery orthopedic_procedure',
+    'heart surgery': 'heart_surgery cardiac_procedure',
+    'brain surgery': 'brain_surgery neurological_procedure',
+    'insurance policy': 'insurance_policy coverage',
+    'claim': 'insurance_claim coverage_request'
+}
+
+def _alternation(terms) -> 're.Pattern':
+    """Compile a whole-word pattern matching any of the given terms."""
+    return re.compile(r'\b(' + '|'.join(re.escape(term) for term in terms) + r')\b')
+
+_ABBREVIATION_RE = _alternation(_MEDICAL_EXPANSIONS)
+_NORMALIZATION_RE = _alternation(_MEDICAL_NORMALIZATIONS)
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, in linear time plus O(k log k)."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
 
 class EnhancedVectorSearch:
     """Enhanced vector search using TF-IDF and cosine similarity for semantic understanding."""
@@ -77,33 +113,14 @@ class EnhancedVectorSearch:
         # Convert to lowercase
         text = text.lower()
         
-        # Expand common medical abbreviations
-        medical_expansions = {
-            'pts': 'patients', 'pt': 'patient', 'dx': 'diagnosis', 'tx': 'treatment',
-            'hx': 'history', 'sx': 'surgery', 'rx': 'prescription', 'yr': 'year',
-            'mo': 'month', 'wk': 'week', 'm': 'male', 'f': 'female',
-            'hosp': 'hospital', 'clinic': 'clinic', 'med': 'medical'
-        }
-        
-        for abbrev, expansion in medical_expansions.items():
-            text = re.sub(rf'\b{abbrev}\b', expansion, text)
-        
-        # Normalize medical terms
-        medical_normalizations = {
-            'knee surgery': 'knee_surgery orthopedic_procedure',
-            'hip surgery': 'hip_surgery orthopedic_procedure',
-            'heart surgery': 'heart_surgery cardiac_procedure',
-            'brain surgery': 'brain_surgery neurological_procedure',
-            'insurance policy': 'insurance_policy coverage',
-            'claim': 'insurance_claim coverage_request'
-        }
-        
-        for term, normalized in medical_normalizations.items():
-            text = re.sub(rf'\b{term}\b', normalized, text)
+        # Expand common medical abbreviations, then normalize medical terms,
+        # each in a single pass over the text
+        text = _ABBREVIATION_RE.sub(lambda match: _MEDICAL_EXPANSIONS[match.group(1)], text)
+        text = _NORMALIZATION_RE.sub(lambda match: _MEDICAL_NORMALIZATIONS[match.group(1)], text)
         
         # Remove extra whitespace and special characters
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
+        text = _NON_WORD_RE.sub(' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
     
@@ -131,11 +148,11 @@ class EnhancedVectorSearch:
         # Transform query using the fitted vectorizer
         query_vector = self.tfidf_vectorizer.transform([expanded_query])
         
-        # Calculate cosine similarity
-        similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+        # TF-IDF rows are L2-normalized at fit time, so cosine similarity is a plain dot product
+        similarities = linear_kernel(query_vector, self.tfidf_matrix).flatten()
         
         # Get top k most similar documents
-        top_indices = similarities.argsort()[-k:][::-1]
+        top_indices = _top_indices(similarities, k)
         
         # Filter out very low similarity scores
         relevant_chunks = []
@@ -208,11 +225,9 @@ class EnhancedVectorSearch:
                 score = len(intersection) / len(query_words)
                 scores.append((score, i))
         
-        # Sort by score and return top k
-        scores.sort(reverse=True, key=lambda x: x[0])
-        
+        # Select the top k without sorting every chunk
         relevant_chunks = []
-        for score, idx in scores[:k]:
+        for score, idx in heapq.nlargest(k, scores, key=lambda x: x[0]):
             if score > 0:
                 relevant_chunks.append(self.document_chunks[idx])
         
@@ -236,9 +251,9 @@ class EnhancedVectorSearch:
         expanded_query = self._expand_query_semantically(processed_query)
         
         query_vector = self.tfidf_vectorizer.transform([expanded_query])
-        similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+        similarities = linear_kernel(query_vector, self.tfidf_matrix).flatten()
         
-        top_indices = similarities.argsort()[-k:][::-1]
+        top_indices = _top_indices(similarities, k)
         
         results = []
         for idx in top_indices:
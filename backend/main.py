@@ -3,23 +3,66 @@ FastAPI backend for DocQuery - wraps existing Python modules with HTTP endpoints
 Provides /upload, /search, and /analyze endpoints while keeping all core modules unchanged.
 """
 
+import asyncio
+import hashlib
+import heapq
+import hmac
+import json
 import os
+import re
 import sys
 import tempfile
 import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+# Size BLAS/OpenMP thread pools for the number of worker processes before any
+# numerical library is imported, so workers don't oversubscribe the CPUs
+THREADS_PER_WORKER = max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", 1))))
+for _thread_var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(_thread_var, str(THREADS_PER_WORKER))
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import BaseModel, Field, StringConstraints
+from typing_extensions import Annotated
 import uvicorn
 
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Import modules from current backend directory
-from document_processor import DocumentProcessor
+from document_processor import (
+    DocumentProcessor, extract_and_chunk, extract_and_chunk_bytes, count_pdf_pages, extract_pdf_pages
+)
 from query_parser import QueryParser
 from output_formatter import OutputFormatter
+from semantic_cache import SemanticCache
+from embedding_batcher import EmbeddingBatcher
+
+# orjson serializes large analysis payloads several times faster than json
+try:
+    import orjson
+    DEFAULT_RESPONSE_CLASS = ORJSONResponse
+except ImportError:
+    DEFAULT_RESPONSE_CLASS = JSONResponse
 
 # Try to import AI clients with fallbacks
 try:
@@ -49,15 +92,18 @@ except ImportError:
         SEARCH_TYPE = "Simple text search"
 
 # Pydantic models for request/response
+# Queries are stripped and must be non-empty; invalid requests get a 422 before reaching a handler
+QueryText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
 class QueryRequest(BaseModel):
-    query: str
+    query: QueryText
     document_id: Optional[str] = None
     use_local_ai: bool = True
 
 class SearchRequest(BaseModel):
-    query: str
-    document_id: str
-    top_k: int = 3
+    query: QueryText
+    document_id: Annotated[str, StringConstraints(min_length=1)]
+    top_k: Annotated[int, Field(ge=1, le=50)] = 3
 
 class AnalysisResponse(BaseModel):
     success: bool
@@ -68,13 +114,68 @@ class AnalysisResponse(BaseModel):
     system: Dict[str, Any]
 
 # FastAPI app setup
+# Process pool for CPU-bound text extraction and chunking, created in lifespan.
+# Each web worker gets its share of the CPUs, like the BLAS thread pools above.
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", THREADS_PER_WORKER))
+cpu_pool: Optional[ProcessPoolExecutor] = None
+
+# Pooled HTTP client shared by outbound API calls, created in lifespan
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))
+http_client = None
+
+def _create_http_client():
+    """Create the shared keep-alive HTTP client, using HTTP/2 when h2 is installed."""
+    if not HTTPX_AVAILABLE:
+        return None
+    return httpx.Client(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=HTTP_TIMEOUT
+    )
+
+def _configure_torch_threads() -> None:
+    """Match torch's intra-op threads to the per-worker budget, if torch is installed."""
+    try:
+        import torch
+    except ImportError:
+        return
+    try:
+        torch.set_num_threads(int(os.environ["OMP_NUM_THREADS"]))
+        torch.set_num_interop_threads(1)
+    except (RuntimeError, ValueError) as e:
+        print(f"Could not configure torch threads: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown."""
+    global cpu_pool, http_client, _openai_client
+    cpu_pool = ProcessPoolExecutor(max_workers=CPU_POOL_WORKERS)
+    http_client = _create_http_client()
+    _configure_torch_threads()
+    await asyncio.get_running_loop().run_in_executor(None, _select_search_backend)
+    try:
+        yield
+    finally:
+        cpu_pool.shutdown(wait=False)
+        cpu_pool = None
+        if http_client is not None:
+            http_client.close()
+            http_client = None
+        # The OpenAI client holds the closed HTTP client, so recreate it on next startup
+        _openai_client = None
+
 app = FastAPI(
     title="DocQuery API",
     description="AI-powered document analysis system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=DEFAULT_RESPONSE_CLASS
 )
 
 # CORS middleware for Next.js frontend
+# Compress larger JSON answers; registered first so CORS stays the outer layer
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "*"],  # Next.js dev server and production
@@ -83,19 +184,392 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Optional bearer-token protection for document endpoints, disabled unless
+# API_BEARER_TOKEN is set. The token is encoded once at import.
+_API_TOKEN_BYTES = os.getenv("API_BEARER_TOKEN", "").encode()
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def verify_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> None:
+    """Reject requests without the configured bearer token using a constant-time compare."""
+    if not _API_TOKEN_BYTES:
+        return
+    supplied = credentials.credentials.encode() if credentials else b""
+    if not hmac.compare_digest(supplied, _API_TOKEN_BYTES):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or missing bearer token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
 # Global state for processed documents (in production, use Redis or database)
 document_store: Dict[str, Dict] = {}
 vector_search_instances: Dict[str, Any] = {}
 
+# Processed uploads keyed by content hash so re-uploading the same file skips
+# extraction, chunking and index building. Least recently used entries are evicted.
+INDEX_CACHE_SIZE = int(os.getenv("INDEX_CACHE_SIZE", 32))
+index_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+# Uploads are read in fixed-size blocks and kept in memory up to this size, so
+# typical documents are extracted without a disk write and read; larger files
+# are spilled to a temporary file
+UPLOAD_BLOCK_SIZE = 64 * 1024
+UPLOAD_MEMORY_LIMIT = int(os.getenv("UPLOAD_MEMORY_LIMIT", 50 * 1024 * 1024))
+
+# Storage type for embedding indexes; int8 uses a quarter of the memory of float32
+INDEX_DTYPE = os.getenv("INDEX_DTYPE", "int8")
+# Chunk embeddings are persisted here so restarts and other workers skip re-embedding
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(tempfile.gettempdir(), "docquery_embeddings"))
+
+# PDFs with at least this many pages are extracted in page ranges spread over the CPU pool
+PARALLEL_PDF_MIN_PAGES = int(os.getenv("PARALLEL_PDF_MIN_PAGES", 32))
+
+# Chunks of extracted text are persisted here by content hash so re-uploads
+# after a restart, or on another worker, skip text extraction and chunking
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "docquery_extractions"))
+
+# Per-key locks so concurrent uploads of the same file are only processed once.
+# A lock is dropped only when no request holds or waits for it; an unlocked lock
+# may still have a woken waiter that hasn't reacquired it yet
+index_locks: Dict[str, asyncio.Lock] = {}
+index_lock_users: Dict[str, int] = {}
+
+# Analysis results per document content, reused for repeated and paraphrased queries
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.86))
+# Cached answers expire so edits to prompts or models take effect without a restart
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", 3600))
+response_cache = SemanticCache(threshold=SEMANTIC_CACHE_THRESHOLD, ttl_seconds=SEMANTIC_CACHE_TTL)
+
+# Query encodings from concurrent requests share one forward pass. The embedding
+# model is a process-wide singleton, so any VectorSearch instance can encode.
+def _make_query_batcher() -> Optional[EmbeddingBatcher]:
+    """Create the shared query batcher if the search backend can embed queries."""
+    if not hasattr(VectorSearch, 'encode_queries'):
+        return None
+    return EmbeddingBatcher(lambda queries: VectorSearch().encode_queries(queries))
+
+query_batcher = _make_query_batcher()
+
 # Initialize core components
 document_processor = DocumentProcessor()
 query_parser = QueryParser()
 output_formatter = OutputFormatter()
 
-@app.get("/")
-async def root():
-    """API health check and information."""
-    return {
+# AI clients are created on first use and shared across requests, since
+# constructing them loads models (local AI) or sets up HTTP clients (OpenAI)
+_local_ai_client = None
+_openai_client = None
+
+def get_local_ai_client():
+    """Lazy loading of the shared LocalAIClient"""
+    global _local_ai_client
+    if _local_ai_client is None:
+        _local_ai_client = LocalAIClient()
+    return _local_ai_client
+
+def get_openai_client():
+    """Lazy loading of the shared OpenAIClient"""
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = OpenAIClient(http_client=http_client)
+    return _openai_client
+
+def _get_cached_index(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Return the cached processing result for an upload, if any."""
+    cached = index_cache.get(cache_key)
+    if cached is not None:
+        index_cache.move_to_end(cache_key)
+    return cached
+
+def _cache_index(cache_key: str, entry: Dict[str, Any]) -> None:
+    """Store a processing result, evicting the least recently used entry when full."""
+    index_cache[cache_key] = entry
+    index_cache.move_to_end(cache_key)
+    while len(index_cache) > INDEX_CACHE_SIZE:
+        index_cache.popitem(last=False)
+
+def _extraction_cache_path(cache_key: str) -> str:
+    """Path of the persisted extraction for an upload cache key."""
+    file_extension, digest = cache_key.split(":", 1)
+    return os.path.join(EXTRACTION_CACHE_DIR, f"{digest}{file_extension}.json")
+
+def _load_extraction(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Load the persisted character count and chunks for an upload, or return None."""
+    try:
+        with open(_extraction_cache_path(cache_key), 'r', encoding='utf-8') as f:
+            extraction = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(extraction, dict) or "character_count" not in extraction or "chunks" not in extraction:
+        return None
+    return extraction
+
+def _save_extraction(cache_key: str, character_count: int, chunks: List[str]) -> None:
+    """Persist the character count and chunks for an upload; failures only cost a cache miss later."""
+    path = _extraction_cache_path(cache_key)
+    try:
+        os.makedirs(EXTRACTION_CACHE_DIR, exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"character_count": character_count, "chunks": chunks}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not persist extraction: {e}")
+
+async def _extract_and_chunk(source: Union[str, bytes], file_name: str) -> Tuple[str, List[str]]:
+    """Extract and chunk an upload, splitting long PDFs into page ranges extracted in parallel."""
+    loop = asyncio.get_running_loop()
+    # Uploads arrive either in memory or, when too large, as a temporary file
+    if isinstance(source, bytes):
+        extract_args = (extract_and_chunk_bytes, source, file_name)
+    else:
+        extract_args = (extract_and_chunk, source)
+    if CPU_POOL_WORKERS < 2 or not file_name.lower().endswith(".pdf"):
+        return await loop.run_in_executor(cpu_pool, *extract_args)
+    
+    try:
+        page_count = await loop.run_in_executor(None, count_pdf_pages, source)
+    except Exception:
+        # Let the regular path report unreadable or encrypted files
+        page_count = 0
+    if page_count < PARALLEL_PDF_MIN_PAGES:
+        return await loop.run_in_executor(cpu_pool, *extract_args)
+    
+    step = -(-page_count // CPU_POOL_WORKERS)
+    try:
+        page_ranges = await asyncio.gather(*(
+            loop.run_in_executor(cpu_pool, extract_pdf_pages, source, start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ))
+    except Exception as e:
+        raise Exception(f"Error extracting text from pdf file: {str(e)}")
+    # Cleaning runs regexes over the whole document, keep it off the event loop with chunking
+    return await loop.run_in_executor(None, _join_and_chunk_pdf_pages, [page for pages in page_ranges for page in pages])
+
+def _join_and_chunk_pdf_pages(page_texts: List[str]) -> Tuple[str, List[str]]:
+    """Join and clean extracted PDF pages, then split the text into chunks."""
+    try:
+        text_content = document_processor.join_pdf_pages(page_texts)
+    except Exception as e:
+        raise Exception(f"Error extracting text from pdf file: {str(e)}")
+    return text_content, document_processor.chunk_text(text_content)
+
+_search_backend_warm = False
+
+def _warm_search_backend() -> None:
+    """Load the embedding model ahead of index building, if the backend has one."""
+    global _search_backend_warm
+    if hasattr(VectorSearch, 'warm_up'):
+        try:
+            VectorSearch().warm_up()
+        except Exception as e:
+            print(f"Search backend warm-up failed: {e}")
+    _search_backend_warm = True
+
+# Small document used to check at startup that a search backend can build an index
+SEARCH_BACKEND_PROBE = "DocQuery search backend availability probe document."
+
+def _select_search_backend() -> None:
+    """
+    Bind VectorSearch to the first backend that can actually build an index.
+    
+    An import succeeding does not guarantee a working backend (the model or FAISS
+    are loaded lazily), so each candidate is probed once here instead of failing
+    on every upload.
+    """
+    global VectorSearch, SEARCH_TYPE, query_batcher, _search_backend_warm
+    candidates = []
+    try:
+        from vector_search import VectorSearch as AdvancedVectorSearch
+        candidates.append((AdvancedVectorSearch, "Advanced semantic search"))
+    except ImportError:
+        pass
+    try:
+        from enhanced_vector_search import EnhancedVectorSearch
+        candidates.append((EnhancedVectorSearch, "Enhanced TF-IDF search"))
+    except ImportError:
+        pass
+    from simple_vector_search import SimpleVectorSearch
+    candidates.append((SimpleVectorSearch, "Simple text search"))
+    
+    for search_cls, search_type in candidates:
+        try:
+            search_cls().build_index([SEARCH_BACKEND_PROBE])
+        except Exception as e:
+            print(f"Search backend {search_cls.__name__} unavailable: {e}")
+            continue
+        VectorSearch, SEARCH_TYPE = search_cls, search_type
+        break
+    
+    # The probe also loaded the embedding model, if any
+    _search_backend_warm = True
+    query_batcher = _make_query_batcher()
+    _build_static_responses()
+
+async def _get_or_process_upload(cache_key: str, source: Union[str, bytes], file_name: str,
+                                 warm_up: Optional[asyncio.Future] = None) -> Dict[str, Any]:
+    """Return the cached processing result for an upload, processing it on a miss."""
+    cached = _get_cached_index(cache_key)
+    if cached is not None:
+        return cached
+    
+    lock = index_locks.setdefault(cache_key, asyncio.Lock())
+    index_lock_users[cache_key] = index_lock_users.get(cache_key, 0) + 1
+    try:
+        async with lock:
+            # Another request may have finished processing while we waited
+            cached = _get_cached_index(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Extraction and chunking are CPU-bound, keep them off the event loop
+            loop = asyncio.get_running_loop()
+            extraction = await loop.run_in_executor(None, _load_extraction, cache_key)
+            if extraction is not None:
+                character_count, chunks = extraction["character_count"], extraction["chunks"]
+            else:
+                text_content, chunks = await _extract_and_chunk(source, file_name)
+                # Only the chunks are searched, so the full text isn't kept in memory
+                character_count = len(text_content)
+                del text_content
+                await loop.run_in_executor(None, _save_extraction, cache_key, character_count, chunks)
+            
+            # Initialize vector search for this document once the model is loaded
+            if warm_up is not None:
+                await warm_up
+            vector_search = await loop.run_in_executor(None, _build_vector_search, chunks)
+            
+            cached = {
+                "character_count": character_count,
+                "chunks": chunks,
+                "vector_search": vector_search
+            }
+            _cache_index(cache_key, cached)
+            return cached
+    finally:
+        index_lock_users[cache_key] -= 1
+        if not index_lock_users[cache_key]:
+            del index_lock_users[cache_key]
+            index_locks.pop(cache_key, None)
+
+def _build_vector_search(chunks: List[str]) -> Optional[Any]:
+    """Build a search index over the chunks, returning None if indexing fails."""
+    if not chunks:
+        # Nothing to index, don't load or run the embedding model
+        return None
+    
+    vector_search = VectorSearch()
+    
+    # Handle different vector search interfaces
+    try:
+        if INDEX_DTYPE in getattr(vector_search, 'SUPPORTED_DTYPES', ()):
+            vector_search.build_index(chunks, dtype=INDEX_DTYPE, cache_dir=EMBEDDING_CACHE_DIR)
+        else:
+            # Every backend indexes all chunks in one batched call
+            vector_search.build_index(chunks)
+    except Exception as search_error:
+        print(f"Vector search setup warning: {search_error}")
+        # Continue without vector search
+        return None
+    
+    return vector_search
+
+async def _embed_query(vector_search: Any, query: str) -> Optional[Any]:
+    """Encode the query through the shared batcher, or return None if unsupported."""
+    if query_batcher is None or not hasattr(vector_search, 'encode_queries'):
+        return None
+    try:
+        return await query_batcher.encode(query)
+    except Exception as e:
+        print(f"Query embedding failed: {e}")
+        return None
+
+def _search_index(vector_search: Any, query: str, k: int, query_embedding: Optional[Any] = None) -> List[str]:
+    """Search an index, reusing a precomputed query embedding when available."""
+    if query_embedding is not None:
+        return vector_search.search(query, k=k, query_embedding=query_embedding)
+    return vector_search.search(query, k=k)
+
+def _keyword_search(query: str, chunks: List[str], k: int) -> List[str]:
+    """Rank chunks by how many distinct query words they contain as whole words."""
+    # Longest words first so the alternation prefers the fullest match
+    words = sorted(set(query.lower().split()), key=len, reverse=True)
+    if not words:
+        return []
+    
+    # One case-insensitive pass per chunk instead of one scan per query word
+    pattern = re.compile(r'(?<!\w)(?:' + '|'.join(map(re.escape, words)) + r')(?!\w)', re.IGNORECASE)
+    scored_chunks = []
+    for chunk in chunks:
+        score = len({match.lower() for match in pattern.findall(chunk)})
+        if score > 0:
+            scored_chunks.append((score, chunk))
+    return [chunk for _, chunk in heapq.nlargest(k, scored_chunks)]
+
+def _find_relevant_chunks(vector_search: Optional[Any], query: str, chunks: List[str], k: int = 3,
+                          query_embedding: Optional[Any] = None) -> List[str]:
+    """Find the chunks of a stored document most relevant to the query."""
+    # Get relevant chunks via search
+    if vector_search is not None:
+        try:
+            if hasattr(vector_search, 'search'):
+                return _search_index(vector_search, query, k, query_embedding)
+            return chunks[:k]  # Fallback
+        except Exception:
+            return chunks[:k]  # Fallback
+    
+    # Simple search fallback
+    relevant_chunks = _keyword_search(query, chunks, k)
+    if not relevant_chunks:
+        relevant_chunks = chunks[:k]
+    return relevant_chunks
+
+def _run_ai_analysis(parsed_query: Dict, relevant_chunks: List[str], query: str, use_local_ai: bool):
+    """Analyze the query with the requested AI client, returning (result, method)."""
+    analysis_result = None
+    ai_method = "rule_based_fallback"
+    
+    if use_local_ai and LOCAL_AI_AVAILABLE:
+        try:
+            local_ai = get_local_ai_client()
+            analysis_result = local_ai.analyze_query(parsed_query, relevant_chunks, query)
+            ai_method = "local_ai"
+        except Exception as e:
+            print(f"Local AI analysis failed: {e}")
+    
+    elif not use_local_ai and OPENAI_AVAILABLE:
+        try:
+            openai_client = get_openai_client()
+            analysis_result = openai_client.analyze_query(parsed_query, relevant_chunks, query)
+            ai_method = "openai_gpt"
+        except Exception as e:
+            print(f"OpenAI analysis failed: {e}")
+    
+    # Fallback analysis if AI fails
+    if not analysis_result:
+        analysis_result = {
+            "decision": "Requires Review",
+            "confidence": "Medium",
+            "justification": "Basic rule-based analysis completed. Advanced AI analysis unavailable.",
+            "recommendations": [
+                "Review the query and document content manually",
+                "Consider enabling AI analysis for more detailed insights"
+            ],
+            "analysis_method": "rule_based_fallback"
+        }
+        ai_method = "rule_based_fallback"
+    
+    return analysis_result, ai_method
+
+def _build_static_responses() -> None:
+    """Build the payloads that only depend on startup configuration."""
+    global CAPABILITIES, ROOT_RESPONSE_BODY
+    CAPABILITIES = {
+        "local_ai": LOCAL_AI_AVAILABLE,
+        "openai": OPENAI_AVAILABLE,
+        "search_type": SEARCH_TYPE
+    }
+    ROOT_RESPONSE_BODY = DEFAULT_RESPONSE_CLASS(content={
         "message": "DocQuery FastAPI Backend",
         "version": "1.0.0",
         "endpoints": {
@@ -103,14 +577,17 @@ async def root():
             "search": "/search - Search within documents",
             "analyze": "/analyze - AI-powered query analysis"
         },
-        "capabilities": {
-            "local_ai": LOCAL_AI_AVAILABLE,
-            "openai": OPENAI_AVAILABLE,
-            "search_type": SEARCH_TYPE
-        }
-    }
+        "capabilities": CAPABILITIES
+    }).body
 
-@app.post("/upload")
+_build_static_responses()
+
+@app.get("/")
+async def root():
+    """API health check and information."""
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
+
+@app.post("/upload", dependencies=[Depends(verify_token)])
 async def upload_document(
     file: UploadFile = File(...),
     document_name: Optional[str] = Form(None)
@@ -126,121 +603,129 @@ async def upload_document(
         # Use provided name or file name
         doc_name = document_name or file.filename or f"document_{document_id[:8]}"
         
-        # Read file content
-        file_content = await file.read()
+        # Load the embedding model while the upload is read and extracted
+        loop = asyncio.get_running_loop()
+        warm_up = None if _search_backend_warm else loop.run_in_executor(None, _warm_search_backend)
         
-        # Create temporary file with proper extension
+        # Read the upload in blocks, hashing it on the way; it stays in memory unless
+        # it outgrows UPLOAD_MEMORY_LIMIT, in which case it is spilled to a temporary file
         file_extension = os.path.splitext(file.filename or "")[1] or ".txt"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            tmp_file.write(file_content)
-            tmp_file_path = tmp_file.name
-        
+        content_hash = hashlib.blake2b(digest_size=16)
+        file_size = 0
+        blocks = []
+        tmp_file = None
         try:
-            # Process document using existing module
-            text_content = document_processor.extract_text(tmp_file_path)
-            chunks = document_processor.chunk_text(text_content)
-            
-            # Initialize vector search for this document
-            vector_search = VectorSearch()
-            
-            # Handle different vector search interfaces
-            try:
-                if hasattr(vector_search, 'build_index'):
-                    vector_search.build_index(chunks)
-                elif hasattr(vector_search, 'add_documents'):
-                    vector_search.add_documents(chunks)
+            while True:
+                block = await file.read(UPLOAD_BLOCK_SIZE)
+                if not block:
+                    break
+                content_hash.update(block)
+                file_size += len(block)
+                if tmp_file is None and file_size > UPLOAD_MEMORY_LIMIT:
+                    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
+                    tmp_file.writelines(blocks)
+                    blocks.clear()
+                if tmp_file is not None:
+                    tmp_file.write(block)
                 else:
-                    # Fallback for simple search
-                    vector_search.documents = chunks
-            except Exception as search_error:
-                print(f"Vector search setup warning: {search_error}")
-                # Continue without vector search
-                vector_search = None
+                    blocks.append(block)
             
-            # Store document and search instance
-            processing_time = time.time() - start_time
-            
-            document_data = {
-                "id": document_id,
-                "name": doc_name,
-                "text_content": text_content,
-                "chunks": chunks,
-                "upload_time": datetime.utcnow().isoformat() + "Z",
-                "processing_time": processing_time,
-                "file_size": len(file_content),
-                "chunk_count": len(chunks)
-            }
-            
-            document_store[document_id] = document_data
-            if vector_search:
-                vector_search_instances[document_id] = vector_search
-            
-            return {
-                "success": True,
-                "document_id": document_id,
-                "document_name": doc_name,
-                "processing_time": f"{processing_time:.3f}s",
-                "statistics": {
-                    "file_size": len(file_content),
-                    "character_count": len(text_content),
-                    "chunk_count": len(chunks),
-                    "average_chunk_size": len(text_content) // len(chunks) if chunks else 0
-                },
-                "capabilities": {
-                    "search_ready": vector_search is not None,
-                    "search_type": SEARCH_TYPE
-                },
-                "message": "Document processed successfully and ready for analysis"
-            }
+            if tmp_file is not None:
+                tmp_file.close()
+                source = tmp_file.name
+            else:
+                source = b"".join(blocks)
+                blocks.clear()
             
+            # Reuse the processing result when the same file was uploaded before
+            cache_key = f"{file_extension}:{content_hash.hexdigest()}"
+            cached = await _get_or_process_upload(cache_key, source, f"upload{file_extension}", warm_up)
         finally:
             # Clean up temp file
-            os.unlink(tmp_file_path)
+            if tmp_file is not None:
+                tmp_file.close()
+                os.unlink(tmp_file.name)
+        character_count = cached["character_count"]
+        chunks = cached["chunks"]
+        vector_search = cached["vector_search"]
+        
+        # Store document and search instance
+        processing_time = time.time() - start_time
+        
+        document_data = {
+            "id": document_id,
+            "name": doc_name,
+            "content_hash": cache_key,
+            "character_count": character_count,
+            "chunks": chunks,
+            "upload_time": datetime.utcnow().isoformat() + "Z",
+            "processing_time": processing_time,
+            "file_size": file_size,
+            "chunk_count": len(chunks)
+        }
+        
+        document_store[document_id] = document_data
+        if vector_search:
+            vector_search_instances[document_id] = vector_search
+        
+        return {
+            "success": True,
+            "document_id": document_id,
+            "document_name": doc_name,
+            "processing_time": f"{processing_time:.3f}s",
+            "statistics": {
+                "file_size": file_size,
+                "character_count": character_count,
+                "chunk_count": len(chunks),
+                "average_chunk_size": character_count // len(chunks) if chunks else 0
+            },
+            "capabilities": {
+                "search_ready": vector_search is not None,
+                "search_type": SEARCH_TYPE
+            },
+            "message": "Document processed successfully and ready for analysis"
+        }
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Document processing failed: {str(e)}")
 
-@app.post("/search")
+@app.post("/search", dependencies=[Depends(verify_token)])
 async def search_documents(request: SearchRequest):
     """
     Search for relevant content within a processed document.
     """
     try:
-        if request.document_id not in document_store:
+        document_data = document_store.get(request.document_id)
+        if document_data is None:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        document_data = document_store[request.document_id]
         chunks = document_data["chunks"]
         
         # Perform vector search if available
-        if request.document_id in vector_search_instances:
-            vector_search = vector_search_instances[request.document_id]
+        vector_search = vector_search_instances.get(request.document_id)
+        # Searches run on the default executor so one request's scoring doesn't stall the event loop
+        loop = asyncio.get_running_loop()
+        if vector_search is not None:
+            query_embedding = await _embed_query(vector_search, request.query)
             try:
                 if hasattr(vector_search, 'search'):
-                    relevant_chunks = vector_search.search(request.query, k=request.top_k)
+                    relevant_chunks = await loop.run_in_executor(
+                        None, _search_index, vector_search, request.query, request.top_k, query_embedding
+                    )
                 else:
                     # Fallback to simple matching
-                    query_lower = request.query.lower()
-                    scored_chunks = []
-                    for chunk in chunks:
-                        score = sum(1 for word in query_lower.split() if word in chunk.lower())
-                        if score > 0:
-                            scored_chunks.append((score, chunk))
-                    scored_chunks.sort(reverse=True)
-                    relevant_chunks = [chunk for _, chunk in scored_chunks[:request.top_k]]
+                    relevant_chunks = await loop.run_in_executor(
+                        None, _keyword_search, request.query, chunks, request.top_k
+                    )
             except Exception as search_error:
                 print(f"Search error: {search_error}")
                 # Fallback to first few chunks
                 relevant_chunks = chunks[:request.top_k]
         else:
             # Simple fallback search
-            query_lower = request.query.lower()
-            relevant_chunks = []
-            for chunk in chunks:
-                if any(word in chunk.lower() for word in query_lower.split()):
-                    relevant_chunks.append(chunk)
-                if len(relevant_chunks) >= request.top_k:
-                    break
+            relevant_chunks = await loop.run_in_executor(
+                None, _keyword_search, request.query, chunks, request.top_k
+            )
             
             if not relevant_chunks:
                 relevant_chunks = chunks[:request.top_k]
@@ -261,7 +746,7 @@ async def search_documents(request: SearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-@app.post("/analyze")
+@app.post("/analyze", dependencies=[Depends(verify_token)])
 async def analyze_query(request: QueryRequest):
     """
     Perform AI-powered analysis of a query against a document.
@@ -276,71 +761,50 @@ async def analyze_query(request: QueryRequest):
         
         relevant_chunks = []
         document_data = None
+        chunks = []
+        vector_search = None
         
         # If document provided, get relevant chunks
         if request.document_id:
-            if request.document_id not in document_store:
+            document_data = document_store.get(request.document_id)
+            if document_data is None:
                 raise HTTPException(status_code=404, detail="Document not found")
             
-            document_data = document_store[request.document_id]
             chunks = document_data["chunks"]
-            
-            # Get relevant chunks via search
-            if request.document_id in vector_search_instances:
-                vector_search = vector_search_instances[request.document_id]
-                try:
-                    if hasattr(vector_search, 'search'):
-                        relevant_chunks = vector_search.search(request.query, k=3)
-                    else:
-                        relevant_chunks = chunks[:3]  # Fallback
-                except Exception:
-                    relevant_chunks = chunks[:3]  # Fallback
-            else:
-                # Simple search fallback
-                query_words = request.query.lower().split()
-                scored_chunks = []
-                for chunk in chunks:
-                    score = sum(1 for word in query_words if word in chunk.lower())
-                    if score > 0:
-                        scored_chunks.append((score, chunk))
-                scored_chunks.sort(reverse=True)
-                relevant_chunks = [chunk for _, chunk in scored_chunks[:3]]
-                if not relevant_chunks:
-                    relevant_chunks = chunks[:3]
-        
-        # Perform AI analysis
-        analysis_result = None
-        ai_method = "rule_based_fallback"
-        
-        if request.use_local_ai and LOCAL_AI_AVAILABLE:
-            try:
-                local_ai = LocalAIClient()
-                analysis_result = local_ai.analyze_query(parsed_query, relevant_chunks, request.query)
-                ai_method = "local_ai"
-            except Exception as e:
-                print(f"Local AI analysis failed: {e}")
+            vector_search = vector_search_instances.get(request.document_id)
         
-        elif not request.use_local_ai and OPENAI_AVAILABLE:
-            try:
-                openai_client = OpenAIClient()
-                analysis_result = openai_client.analyze_query(parsed_query, relevant_chunks, request.query)
-                ai_method = "openai_gpt"
-            except Exception as e:
-                print(f"OpenAI analysis failed: {e}")
-        
-        # Fallback analysis if AI fails
-        if not analysis_result:
-            analysis_result = {
-                "decision": "Requires Review",
-                "confidence": "Medium",
-                "justification": "Basic rule-based analysis completed. Advanced AI analysis unavailable.",
-                "recommendations": [
-                    "Review the query and document content manually",
-                    "Consider enabling AI analysis for more detailed insights"
-                ],
-                "analysis_method": "rule_based_fallback"
-            }
-            ai_method = "rule_based_fallback"
+        # Reuse a previous analysis of the same (or a paraphrased) query on this content
+        cache_key = f"{document_data['content_hash'] if document_data else 'no_document'}:{request.use_local_ai}"
+        # Exact repeats are answered without running the encoder at all. Similar
+        # queries can differ in age, gender or location, so a cached analysis is
+        # only reused when it was made for the same parsed query.
+        same_parsed_query = lambda cached_result: cached_result[3] == parsed_query
+        query_embedding = None
+        cached = response_cache.lookup(cache_key, request.query, accept=same_parsed_query, count_miss=False)
+        if cached is None:
+            if vector_search is not None:
+                query_embedding = await _embed_query(vector_search, request.query)
+            # The final lookup counts the outcome, so each query is one hit or one miss
+            cached = response_cache.lookup(cache_key, request.query, query_embedding, accept=same_parsed_query)
+        if cached is not None:
+            relevant_chunks, analysis_result, ai_method, _ = cached
+        else:
+            # Search and AI calls block, so they run on the default executor
+            loop = asyncio.get_running_loop()
+            if document_data:
+                relevant_chunks = await loop.run_in_executor(
+                    None, _find_relevant_chunks, vector_search, request.query, chunks, 3, query_embedding
+                )
+            
+            analysis_result, ai_method = await loop.run_in_executor(
+                None, _run_ai_analysis, parsed_query, relevant_chunks, request.query, request.use_local_ai
+            )
+            
+            # Rule-based fallbacks are cheap, only AI results are worth caching
+            if ai_method != "rule_based_fallback":
+                response_cache.store(
+                    cache_key, request.query, (relevant_chunks, analysis_result, ai_method, parsed_query), query_embedding
+                )
         
         # Format response using existing output formatter
         processing_time = time.time() - start_time
@@ -383,7 +847,7 @@ async def analyze_query(request: QueryRequest):
                 "capabilities_used": {
                     "local_ai": LOCAL_AI_AVAILABLE and request.use_local_ai,
                     "openai": OPENAI_AVAILABLE and not request.use_local_ai,
-                    "vector_search": request.document_id in vector_search_instances if request.document_id else False
+                    "vector_search": vector_search is not None
                 }
             }
         }
@@ -395,7 +859,56 @@ async def analyze_query(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
-@app.get("/documents")
+def _sse_event(payload: Dict[str, Any]) -> bytes:
+    """Encode one server-sent event carrying a JSON payload."""
+    return b"data: " + json.dumps(payload).encode() + b"\n\n"
+
+def _stream_openai_analysis(parsed_query: Dict, relevant_chunks: List[str], query: str):
+    """Yield OpenAI analysis text as server-sent events, ending with the validated result."""
+    openai_client = get_openai_client()
+    parts = []
+    try:
+        for delta in openai_client.analyze_query_stream(parsed_query, relevant_chunks, query):
+            parts.append(delta)
+            yield _sse_event({"delta": delta})
+        result = openai_client.parse_analysis("".join(parts))
+    except Exception as e:
+        yield _sse_event({"error": str(e)})
+        return
+    yield _sse_event({"result": result, "chunks_analyzed": len(relevant_chunks)})
+
+@app.post("/analyze/stream", dependencies=[Depends(verify_token)])
+async def analyze_query_stream(request: QueryRequest):
+    """
+    Analyze a query with OpenAI, streaming the response as server-sent events.
+    Clients can render "delta" events as they arrive; the last event holds the
+    validated "result", or an "error".
+    """
+    if not OPENAI_AVAILABLE:
+        raise HTTPException(status_code=503, detail="OpenAI analysis not available")
+    
+    relevant_chunks = []
+    if request.document_id:
+        document_data = document_store.get(request.document_id)
+        if document_data is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        vector_search = vector_search_instances.get(request.document_id)
+        query_embedding = await _embed_query(vector_search, request.query) if vector_search is not None else None
+        relevant_chunks = await asyncio.get_running_loop().run_in_executor(
+            None, _find_relevant_chunks, vector_search, request.query, document_data["chunks"], 3, query_embedding
+        )
+    
+    parsed_query = query_parser.parse_query(request.query)
+    # The blocking OpenAI stream is iterated on Starlette's threadpool. An explicit
+    # identity encoding keeps GZipMiddleware from buffering events until the end.
+    return StreamingResponse(
+        _stream_openai_analysis(parsed_query, relevant_chunks, request.query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"}
+    )
+
+@app.get("/documents", dependencies=[Depends(verify_token)])
 async def list_documents():
     """List all uploaded documents."""
     return {
@@ -413,41 +926,76 @@ async def list_documents():
         "total": len(document_store)
     }
 
-@app.delete("/documents/{document_id}")
+@app.delete("/documents/{document_id}", dependencies=[Depends(verify_token)])
 async def delete_document(document_id: str):
     """Delete a processed document."""
-    if document_id not in document_store:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
     # Remove from stores
-    del document_store[document_id]
-    if document_id in vector_search_instances:
-        del vector_search_instances[document_id]
+    if document_store.pop(document_id, None) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    vector_search_instances.pop(document_id, None)
     
     return {
         "success": True,
         "message": f"Document {document_id} deleted successfully"
     }
 
+# Health timestamps have one second resolution, so the formatted string is
+# reused for every probe within the same second
+_timestamp_cache = [-1, ""]
+
+def _cached_utc_timestamp() -> str:
+    """Return the current UTC time as an ISO 8601 string, cached per second."""
+    now = int(time.time())
+    if now != _timestamp_cache[0]:
+        _timestamp_cache[0] = now
+        _timestamp_cache[1] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+    return _timestamp_cache[1]
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "capabilities": {
-            "local_ai": LOCAL_AI_AVAILABLE,
-            "openai": OPENAI_AVAILABLE,
-            "search_type": SEARCH_TYPE
-        },
-        "documents_loaded": len(document_store)
+        "timestamp": _cached_utc_timestamp(),
+        "capabilities": CAPABILITIES,
+        "documents_loaded": len(document_store),
+        "response_cache": response_cache.get_stats()
     }
 
-if __name__ == "__main__":
+def run_server():
+    """
+    Run the API with uvicorn.
+    
+    Uses the uvloop event loop and httptools HTTP parser when they are installed,
+    falling back to uvicorn's defaults (e.g. on Windows). Set RELOAD=false to
+    disable auto-reload, in which case WEB_CONCURRENCY worker processes are started.
+    
+    Each worker limits OMP/MKL/OpenBLAS (and torch) to cpu_count // WEB_CONCURRENCY
+    threads unless those variables are already set in the environment.
+    """
+    try:
+        import uvloop
+        loop = "uvloop"
+    except ImportError:
+        loop = "auto"
+    
+    try:
+        import httptools
+        http = "httptools"
+    except ImportError:
+        http = "auto"
+    
     port = int(os.getenv("PORT", 8000))
+    reload = os.getenv("RELOAD", "true").lower() == "true"
     uvicorn.run(
         "main:app",
         host="0.0.0.0", 
         port=port,
-        reload=True
-    )
\ No newline at end of file
+        reload=reload,
+        workers=None if reload else int(os.getenv("WEB_CONCURRENCY", 1)),
+        loop=loop,
+        http=http
+    )
+
+if __name__ == "__main__":
+    run_server()
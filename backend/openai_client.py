@@ -1,18 +1,27 @@
 import os
 import json
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from openai import OpenAI
 
 class OpenAIClient:
     """Handles OpenAI API interactions for document analysis and decision making."""
     
-    def __init__(self):
-        """Initialize OpenAI client with API key from environment."""
-        api_key = os.getenv("OPENAI_API_KEY")
+    def __init__(self, api_key: Optional[str] = None, http_client=None):
+        """
+        Initialize OpenAI client with an explicit API key or one from the environment.
+        
+        Args:
+            api_key: Optional API key; defaults to OPENAI_API_KEY
+            http_client: Optional shared httpx.Client to reuse pooled connections
+        """
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise Exception("OpenAI API key not found in environment variables")
         
-        self.client = OpenAI(api_key=api_key)
+        if http_client is not None:
+            self.client = OpenAI(api_key=api_key, http_client=http_client)
+        else:
+            self.client = OpenAI(api_key=api_key)
     
     def analyze_query(self, parsed_query: Dict, relevant_chunks: List[str], original_query: str) -> Dict:
         """
@@ -27,46 +36,87 @@ class OpenAIClient:
             Dictionary containing decision, justification, and other analysis results
         """
         try:
-            # Prepare context from relevant chunks
-            context = "\n\n".join([f"DOCUMENT SECTION {i+1}:\n{chunk}" for i, chunk in enumerate(relevant_chunks)])
-            
-            # Create the analysis prompt
-            prompt = self._create_analysis_prompt(parsed_query, context, original_query)
-            
-            # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            # do not change this unless explicitly requested by the user
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Using gpt-3.5-turbo as specified in requirements
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert policy analyst that reviews insurance policies, contracts, and legal documents. You must provide accurate decisions based on the provided document sections and respond in valid JSON format."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.1,  # Low temperature for consistent, factual responses
-                max_tokens=1000
+                **self._completion_request(parsed_query, relevant_chunks, original_query)
             )
             
             # Parse and validate response
             response_content = response.choices[0].message.content
             if response_content is None:
                 raise Exception("Empty response from OpenAI API")
-            result = json.loads(response_content)
+            return self.parse_analysis(response_content)
             
-            # Ensure required fields are present
-            validated_result = self._validate_response(result)
+        except Exception as e:
+            raise Exception(f"OpenAI API call failed: {str(e)}")
+    
+    def analyze_query_stream(self, parsed_query: Dict, relevant_chunks: List[str],
+                             original_query: str) -> Iterator[str]:
+        """
+        Analyze query against relevant document chunks, yielding the response as it is generated.
+        
+        Args:
+            parsed_query: Structured query data extracted from user input
+            relevant_chunks: Most relevant document sections from vector search
+            original_query: Original user query string
             
-            return validated_result
+        Yields:
+            Fragments of the JSON response text; pass their concatenation to parse_analysis()
+        """
+        try:
+            stream = self.client.chat.completions.create(
+                stream=True,
+                **self._completion_request(parsed_query, relevant_chunks, original_query)
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"OpenAI API call failed: {str(e)}")
+    
+    def parse_analysis(self, response_content: str) -> Dict:
+        """
+        Parse and validate the JSON text of an analysis response.
+        
+        Args:
+            response_content: Complete response text from the model
             
+        Returns:
+            Validated analysis result
+        """
+        try:
+            result = json.loads(response_content)
         except json.JSONDecodeError as e:
             raise Exception(f"Failed to parse OpenAI response as JSON: {str(e)}")
-        except Exception as e:
-            raise Exception(f"OpenAI API call failed: {str(e)}")
+        
+        # Ensure required fields are present
+        return self._validate_response(result)
+    
+    def _completion_request(self, parsed_query: Dict, relevant_chunks: List[str], original_query: str) -> Dict:
+        """Build the chat completion arguments shared by blocking and streaming analysis."""
+        # Prepare context from relevant chunks
+        context = "\n\n".join([f"DOCUMENT SECTION {i+1}:\n{chunk}" for i, chunk in enumerate(relevant_chunks)])
+        
+        # Create the analysis prompt
+        prompt = self._create_analysis_prompt(parsed_query, context, original_query)
+        
+        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+        # do not change this unless explicitly requested by the user
+        return {
+            "model": "gpt-3.5-turbo",  # Using gpt-3.5-turbo as specified in requirements
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert policy analyst that reviews insurance policies, contracts, and legal documents. You must provide accurate decisions based on the provided document sections and respond in valid JSON format."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.1,  # Low temperature for consistent, factual responses
+            "max_tokens": 1000
+        }
     
     def _create_analysis_prompt(self, parsed_query: Dict, context: str, original_query: str) -> str:
         """
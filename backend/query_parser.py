@@ -1,6 +1,12 @@
 import re
 from typing import Dict, Optional, List
 
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _compile(patterns: List[str], flags: int = 0) -> List['re.Pattern']:
+    """Compile a list of regex patterns with shared flags."""
+    return [re.compile(pattern, flags) for pattern in patterns]
+
 class QueryParser:
     """Parses natural language queries to extract structured information."""
     
@@ -54,6 +60,25 @@ class QueryParser:
             r'[\$₹€£]\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
             r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*(?:dollars|rupees|euros|pounds|rs|inr)',
         ]
+        
+        self.procedure_keywords = [
+            'surgery', 'operation', 'procedure', 'treatment', 'repair', 
+            'replacement', 'implant', 'biopsy', 'transplant', 'removal'
+        ]
+        
+        # Compile every pattern once so parsing does no regex compilation
+        self.age_patterns = _compile(self.age_patterns, re.IGNORECASE)
+        self.gender_patterns = _compile(self.gender_patterns, re.IGNORECASE)
+        self.procedure_patterns = _compile(self.procedure_patterns, re.IGNORECASE)
+        self.location_patterns = _compile(self.location_patterns)
+        self.policy_duration_patterns = _compile(self.policy_duration_patterns, re.IGNORECASE)
+        self.medical_condition_patterns = _compile(self.medical_condition_patterns, re.IGNORECASE)
+        self.urgency_patterns = _compile(self.urgency_patterns, re.IGNORECASE)
+        self.claim_amount_patterns = _compile(self.claim_amount_patterns, re.IGNORECASE)
+        self.procedure_keyword_patterns = {
+            keyword: re.compile(rf'(\w+\s+)*{keyword}(\s+\w+)*', re.IGNORECASE)
+            for keyword in self.procedure_keywords
+        }
     
     def parse_query(self, query: str) -> Dict[str, Optional[str]]:
         """
@@ -84,7 +109,7 @@ class QueryParser:
     def _extract_age(self, query: str) -> Optional[str]:
         """Extract age from query."""
         for pattern in self.age_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+            match = pattern.search(query)
             if match:
                 age = int(match.group(1))
                 if 0 <= age <= 120:  # Reasonable age range
@@ -94,7 +119,7 @@ class QueryParser:
     def _extract_gender(self, original_query: str, query_lower: str) -> Optional[str]:
         """Extract gender from query."""
         for pattern in self.gender_patterns:
-            match = re.search(pattern, query_lower, re.IGNORECASE)
+            match = pattern.search(query_lower)
             if match:
                 gender_text = match.group(1).lower()
                 if gender_text in ['m', 'male', 'man']:
@@ -112,24 +137,18 @@ class QueryParser:
     def _extract_procedure(self, query: str) -> Optional[str]:
         """Extract medical procedure from query."""
         for pattern in self.procedure_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+            match = pattern.search(query)
             if match:
                 procedure = match.group(1).strip()
                 # Clean up the procedure name
-                procedure = re.sub(r'\s+', ' ', procedure)
+                procedure = _WHITESPACE_RE.sub(' ', procedure)
                 return procedure.title()
         
         # Look for common procedure keywords
-        procedure_keywords = [
-            'surgery', 'operation', 'procedure', 'treatment', 'repair', 
-            'replacement', 'implant', 'biopsy', 'transplant', 'removal'
-        ]
-        
-        for keyword in procedure_keywords:
+        for keyword in self.procedure_keywords:
             if keyword in query:
                 # Try to extract surrounding context
-                pattern = rf'(\w+\s+)*{keyword}(\s+\w+)*'
-                match = re.search(pattern, query, re.IGNORECASE)
+                match = self.procedure_keyword_patterns[keyword].search(query)
                 if match:
                     return match.group(0).strip().title()
         
@@ -138,7 +157,7 @@ class QueryParser:
     def _extract_location(self, query: str) -> Optional[str]:
         """Extract location from query."""
         for pattern in self.location_patterns:
-            match = re.search(pattern, query)
+            match = pattern.search(query)
             if match:
                 location = match.group(1).strip()
                 # Filter out common false positives
@@ -149,7 +168,7 @@ class QueryParser:
     def _extract_policy_duration(self, query: str) -> Optional[str]:
         """Extract policy duration from query."""
         for pattern in self.policy_duration_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+            match = pattern.search(query)
             if match:
                 duration = match.group(1)
                 # Determine if it's months or years based on context
@@ -195,18 +214,18 @@ class QueryParser:
     def _extract_medical_condition(self, query: str) -> Optional[str]:
         """Extract pre-existing or mentioned medical conditions."""
         for pattern in self.medical_condition_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+            match = pattern.search(query)
             if match:
                 condition = match.group(1).strip()
                 # Clean up the condition name
-                condition = re.sub(r'\s+', ' ', condition)
+                condition = _WHITESPACE_RE.sub(' ', condition)
                 return condition.title()
         return None
     
     def _extract_urgency(self, query: str) -> Optional[str]:
         """Extract urgency level from query."""
         for pattern in self.urgency_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+            match = pattern.search(query)
             if match:
                 return match.group(0).lower()
         return None
@@ -214,7 +233,7 @@ class QueryParser:
     def _extract_claim_amount(self, query: str) -> Optional[str]:
         """Extract claim amount from query."""
         for pattern in self.claim_amount_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+            match = pattern.search(query)
             if match:
                 amount = match.group(1)
                 return amount
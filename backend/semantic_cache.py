@@ -0,0 +1,149 @@
+"""
+Semantic response cache for repeated and paraphrased queries against the same document.
+Answers are reused when the query text matches exactly or, when query embeddings are
+available, when a cached query is within a cosine similarity threshold.
+"""
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class SemanticCache:
+    """Per-document cache of analysis results keyed by query text and embedding."""
+
+    def __init__(self, threshold: float = 0.86, max_entries_per_document: int = 256,
+                 max_documents: int = 128, ttl_seconds: Optional[float] = 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cached query to count as a hit
+            max_entries_per_document: Number of cached answers kept per document
+            max_documents: Number of documents with cached answers; least recently used are evicted
+            ttl_seconds: Age after which a document's cached answers expire, or None to keep them
+        """
+        self.threshold = threshold
+        self.max_entries_per_document = max_entries_per_document
+        self.max_documents = max_documents
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normalize query text for exact-match lookups."""
+        return re.sub(r'\s+', ' ', query.lower()).strip()
+
+    def lookup(self, document_key: str, query: str, embedding: Optional[Any] = None,
+               accept: Optional[Callable[[Any], bool]] = None, count_miss: bool = True) -> Optional[Any]:
+        """
+        Find a cached result for the query.
+
+        Args:
+            document_key: Identifier of the document content the result belongs to
+            query: Query string
+            embedding: Optional L2-normalized query embedding
+            accept: Optional check a cached result must pass to be reused, e.g. that it
+                was produced for the same parsed query; rejected results count as misses
+            count_miss: Whether a miss updates the statistics; False for a cheap first
+                probe that is followed by a full lookup, so each query counts once
+
+        Returns:
+            Cached result, or None on a miss
+        """
+        entry = self._get_entry(document_key)
+        if entry is None:
+            self.misses += count_miss
+            return None
+
+        index = entry["lookup"].get(self.normalize_query(query))
+        if index is not None:
+            return self._accept(entry["results"][index], accept, count_miss)
+
+        if embedding is None or entry["embeddings"] is None or not NUMPY_AVAILABLE:
+            self.misses += count_miss
+            return None
+
+        # One matrix-vector product scores the query against every cached embedding
+        similarities = entry["embeddings"] @ np.asarray(embedding, dtype=np.float32).ravel()
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return self._accept(entry["results"][entry["embedding_rows"][best]], accept, count_miss)
+
+        self.misses += count_miss
+        return None
+
+    def _accept(self, result: Any, accept: Optional[Callable[[Any], bool]], count_miss: bool) -> Optional[Any]:
+        """Count and return a cached result, or count a miss if the caller rejects it."""
+        if accept is not None and not accept(result):
+            self.misses += count_miss
+            return None
+        self.hits += 1
+        return result
+
+    def store(self, document_key: str, query: str, result: Any, embedding: Optional[Any] = None) -> None:
+        """
+        Cache a result for the query.
+
+        Args:
+            document_key: Identifier of the document content the result belongs to
+            query: Query string
+            result: Result to cache
+            embedding: Optional L2-normalized query embedding
+        """
+        entry = self._get_entry(document_key)
+        if entry is None or len(entry["results"]) >= self.max_entries_per_document:
+            # Start over rather than tracking per-entry age; hot queries repopulate quickly
+            entry = {"lookup": {}, "results": [], "embeddings": None, "embedding_rows": [],
+                     "created_at": time.monotonic()}
+            self._entries[document_key] = entry
+            self._entries.move_to_end(document_key)
+            while len(self._entries) > self.max_documents:
+                self._entries.popitem(last=False)
+
+        entry["lookup"][self.normalize_query(query)] = len(entry["results"])
+
+        if embedding is not None and NUMPY_AVAILABLE:
+            row = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+            if entry["embeddings"] is None:
+                entry["embeddings"] = row
+            else:
+                entry["embeddings"] = np.vstack([entry["embeddings"], row])
+            entry["embedding_rows"].append(len(entry["results"]))
+
+        entry["results"].append(result)
+
+    def _get_entry(self, document_key: str) -> Optional[Dict[str, Any]]:
+        """Return a document's live cache entry, dropping it if it has expired."""
+        entry = self._entries.get(document_key)
+        if entry is None:
+            return None
+        if self.ttl_seconds is not None and time.monotonic() - entry["created_at"] > self.ttl_seconds:
+            del self._entries[document_key]
+            return None
+        self._entries.move_to_end(document_key)
+        return entry
+
+    def clear(self, document_key: Optional[str] = None) -> None:
+        """Drop cached results for one document, or for all documents."""
+        if document_key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(document_key, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return cache size and hit statistics."""
+        return {
+            "documents": len(self._entries),
+            "entries": sum(len(entry["results"]) for entry in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -49,6 +49,9 @@ except Exception as e:
 class DemoDocQueryBackend:
     def __init__(self):
         self.documents = {}
+        # Stateless helpers shared by every request
+        self.query_parser = QueryParser() if QUERY_PARSER_AVAILABLE else None
+        self.document_processor = DocumentProcessor() if DOCUMENT_PROCESSOR_AVAILABLE else None
         print("🚀 DocQuery Demo Backend initialized")
         
     def process_text_content(self, content: str) -> List[str]:
@@ -72,8 +75,7 @@ class DemoDocQueryBackend:
                     return f.read()
             elif file_ext == '.pdf' and DOCUMENT_PROCESSOR_AVAILABLE:
                 # Use real document processor if available
-                processor = DocumentProcessor()
-                return processor.extract_text(file_path)
+                return self.document_processor.extract_text(file_path)
             else:
                 # Fallback: try to read as text
                 with open(file_path, 'rb') as f:
@@ -189,8 +191,7 @@ class DemoDocQueryBackend:
         parsed_query = {}
         if QUERY_PARSER_AVAILABLE:
             try:
-                parser = QueryParser()
-                parsed_query = parser.parse_query(query)
+                parsed_query = self.query_parser.parse_query(query)
             except Exception as e:
                 print(f"Query parsing error: {e}")
         
@@ -1,7 +1,18 @@
+import heapq
 import re
 from typing import List, Tuple
 from collections import Counter
 
+_WHITESPACE_RE = re.compile(r'\s+')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+# Medical/insurance terms that earn a bonus when shared by query and chunk
+_MEDICAL_KEYWORDS = frozenset([
+    'surgery', 'procedure', 'treatment', 'medical', 'hospital', 
+    'insurance', 'policy', 'coverage', 'claim', 'benefit',
+    'knee', 'hip', 'heart', 'brain', 'liver', 'kidney'
+])
+
 class SimpleVectorSearch:
     """Simple text-based search as fallback when ML dependencies are not available."""
     
@@ -9,6 +20,7 @@ class SimpleVectorSearch:
         """Initialize the simple search system."""
         self.document_chunks = []
         self.processed_chunks = []
+        self.chunk_word_sets = []
     
     def build_index(self, document_chunks: List[str]) -> None:
         """
@@ -22,11 +34,13 @@ class SimpleVectorSearch:
         
         self.document_chunks = document_chunks
         
-        # Preprocess chunks for better text matching
+        # Preprocess and tokenize chunks once so searches only intersect sets
         self.processed_chunks = []
+        self.chunk_word_sets = []
         for chunk in document_chunks:
             processed = self._preprocess_text(chunk)
             self.processed_chunks.append(processed)
+            self.chunk_word_sets.append(frozenset(processed.split()))
     
     def _preprocess_text(self, text: str) -> str:
         """
@@ -42,10 +56,10 @@ class SimpleVectorSearch:
         text = text.lower()
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # Remove special characters but keep alphanumeric and spaces
-        text = re.sub(r'[^\w\s]', ' ', text)
+        text = _NON_WORD_RE.sub(' ', text)
         
         return text.strip()
     
@@ -70,47 +84,37 @@ class SimpleVectorSearch:
         processed_query = self._preprocess_text(query)
         query_words = set(processed_query.split())
         
+        query_keywords = query_words & _MEDICAL_KEYWORDS
+        check_phrase = len(processed_query) > 3  # Only for meaningful queries
+        
         # Score each chunk
         scores = []
-        for i, processed_chunk in enumerate(self.processed_chunks):
-            chunk_words = set(processed_chunk.split())
-            
+        for i, (processed_chunk, chunk_words) in enumerate(zip(self.processed_chunks, self.chunk_word_sets)):
             # Calculate similarity score
-            intersection = query_words.intersection(chunk_words)
-            union = query_words.union(chunk_words)
+            overlap = len(query_words & chunk_words)
+            union_size = len(query_words) + len(chunk_words) - overlap
             
-            if len(union) == 0:
+            if union_size == 0:
                 jaccard_score = 0
             else:
-                jaccard_score = len(intersection) / len(union)
+                jaccard_score = overlap / union_size
             
             # Add bonus for exact phrase matches
             phrase_bonus = 0
-            if len(processed_query) > 3:  # Only for meaningful queries
-                if processed_query in processed_chunk:
-                    phrase_bonus = 0.5
+            if check_phrase and processed_query in processed_chunk:
+                phrase_bonus = 0.5
             
             # Add bonus for medical/insurance keywords
-            medical_keywords = [
-                'surgery', 'procedure', 'treatment', 'medical', 'hospital', 
-                'insurance', 'policy', 'coverage', 'claim', 'benefit',
-                'knee', 'hip', 'heart', 'brain', 'liver', 'kidney'
-            ]
-            
-            keyword_bonus = 0
-            for keyword in medical_keywords:
-                if keyword in query_words and keyword in chunk_words:
-                    keyword_bonus += 0.1
+            keyword_bonus = 0.1 * len(query_keywords & chunk_words)
             
             total_score = jaccard_score + phrase_bonus + min(keyword_bonus, 0.3)
             scores.append((total_score, i))
         
-        # Sort by score and return top k
-        scores.sort(reverse=True, key=lambda x: x[0])
+        # Select the top k without sorting every chunk
         k = min(k, len(self.document_chunks))
         
         relevant_chunks = []
-        for score, idx in scores[:k]:
+        for score, idx in heapq.nlargest(k, scores, key=lambda x: x[0]):
             if score > 0:  # Only return chunks with some relevance
                 relevant_chunks.append(self.document_chunks[idx])
         
@@ -2,25 +2,36 @@ import os
 # Add memory optimization and disable tokenizers parallelism for serverless
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+import hashlib
+import json
+import threading
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
 # Lazy loading for heavy dependencies
-_sentence_transformer_model = None
+_sentence_transformer_models = {}
+_model_lock = threading.Lock()
 _faiss_module = None
+_bm25s_module = None
 
-def get_sentence_transformer():
-    """Lazy loading of SentenceTransformer model"""
-    global _sentence_transformer_model
-    if _sentence_transformer_model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-            # Use smaller model (80MB instead of 420MB)
-            model_name = 'all-MiniLM-L6-v2'
-            _sentence_transformer_model = SentenceTransformer(model_name)
-        except ImportError:
-            raise Exception("sentence-transformers not available")
-    return _sentence_transformer_model
+def get_sentence_transformer(model_name: str = 'all-MiniLM-L6-v2'):
+    """Lazy loading of a SentenceTransformer model shared by every VectorSearch instance"""
+    model = _sentence_transformer_models.get(model_name)
+    if model is None:
+        # Concurrent first requests wait for one load instead of each loading the model
+        with _model_lock:
+            model = _sentence_transformer_models.get(model_name)
+            if model is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                except ImportError:
+                    raise Exception("sentence-transformers not available")
+                # Default to the small model (80MB instead of 420MB)
+                model = SentenceTransformer(model_name)
+                _sentence_transformer_models[model_name] = model
+    return model
 
 def get_faiss():
     """Lazy loading of FAISS module"""
@@ -33,9 +44,151 @@ def get_faiss():
             raise Exception("faiss-cpu not available")
     return _faiss_module
 
+def get_bm25s():
+    """Lazy loading of bm25s module"""
+    global _bm25s_module
+    if _bm25s_module is None:
+        try:
+            import bm25s
+            _bm25s_module = bm25s
+        except ImportError:
+            raise Exception("bm25s not available")
+    return _bm25s_module
+
+# Bump when the persisted embedding format changes so stale files are ignored
+EMBEDDING_CACHE_VERSION = 1
+
+# Largest total size of persisted embedding files; least recently used files
+# are removed once a save pushes the cache directory past it
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Documents with more chunks than this are indexed with approximate HNSW search
+HNSW_THRESHOLD = 10000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Documents with more chunks than this are narrowed to this many BM25 candidates
+# before dense scoring, which also lifts recall on rare terms such as drug names
+BM25_PREFILTER_CANDIDATES = max(1, int(os.getenv("BM25_PREFILTER_CANDIDATES", "200")))
+
+# Index storage used when callers don't choose one; int8 uses a quarter of the
+# memory of float32 with near-identical ranking on normalized embeddings
+DEFAULT_INDEX_DTYPE = os.getenv("INDEX_DTYPE", "int8")
+
+# Largest number of chunks encoded per forward pass; GPUs and remote encoders
+# amortize per-call overhead better with larger batches
+EMBEDDING_BATCH_SIZE = max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", "64")))
+
+# Number of batches encoded concurrently. PyTorch already spreads one batch
+# over all cores on CPU, so this only pays off for GPU or remote encoders.
+EMBED_CONCURRENCY = max(1, int(os.getenv("EMBED_CONCURRENCY", "1")))
+_embed_pool = None
+_embed_pool_lock = threading.Lock()
+
+def _get_embed_pool() -> ThreadPoolExecutor:
+    """Lazily create the shared pool used for concurrent batch encoding"""
+    global _embed_pool
+    if _embed_pool is None:
+        with _embed_pool_lock:
+            if _embed_pool is None:
+                _embed_pool = ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY)
+    return _embed_pool
+
+# Process-wide LRU of normalized chunk embeddings keyed by model and chunk
+# content, so text repeated across documents is only embedded once
+CHUNK_EMBEDDING_CACHE_SIZE = 20000
+_chunk_embedding_cache = OrderedDict()
+_chunk_embedding_lock = threading.Lock()
+
+# Process-wide LRU of query embeddings keyed by model and whitespace-normalized
+# query text, so repeated queries and re-runs with a different k skip the encoder
+QUERY_EMBEDDING_CACHE_SIZE = 256
+_query_embedding_cache = OrderedDict()
+_query_embedding_lock = threading.Lock()
+
+def _prune_embedding_cache(cache_dir: str) -> None:
+    """Remove least recently used embedding files until the cache fits EMBEDDING_CACHE_MAX_BYTES."""
+    try:
+        entries = [entry for entry in os.scandir(cache_dir)
+                   if entry.is_file() and not entry.name.endswith(".tmp")]
+        files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries]
+    except OSError:
+        return
+    
+    total = sum(size for _, size, _ in files)
+    for _, size, file_path in sorted(files):
+        if total <= EMBEDDING_CACHE_MAX_BYTES:
+            break
+        try:
+            # Memory-mapped readers keep their mapping after the file is unlinked
+            os.remove(file_path)
+        except OSError:
+            continue
+        total -= size
+
+class Int8InnerProductIndex:
+    """
+    Inner-product index over int8 embeddings with symmetric per-vector scales.
+    
+    Mirrors the parts of the FAISS index interface used by VectorSearch and stores
+    a quarter of the bytes of a float32 index.
+    """
+    
+    def __init__(self, embeddings: np.ndarray):
+        """
+        Quantize and store the embeddings.
+        
+        Args:
+            embeddings: Float embeddings of shape (n, dimension)
+        """
+        self.codes, self.scales = self._quantize(embeddings)
+        self.ntotal, self.d = self.codes.shape
+    
+    @staticmethod
+    def _quantize(vectors: np.ndarray):
+        """Quantize each row to int8 using its own max-abs scale."""
+        scales = np.max(np.abs(vectors), axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    
+    def search(self, queries: np.ndarray, k: int, candidates: Optional[np.ndarray] = None):
+        """
+        Find the k highest inner-product rows for each query.
+        
+        Args:
+            queries: Float query embeddings of shape (m, dimension)
+            k: Number of results per query
+            candidates: Optional row ids to restrict scoring to
+            
+        Returns:
+            Tuple of (scores, indices) arrays of shape (m, k)
+        """
+        query_codes, query_scales = self._quantize(np.asarray(queries, dtype=np.float32))
+        codes, scales = self.codes, self.scales
+        if candidates is not None:
+            codes, scales = codes[candidates], scales[candidates]
+        
+        # Accumulate in int32, then dequantize with both scales
+        raw = np.matmul(query_codes, codes.T, dtype=np.int32)
+        scores = raw * query_scales[:, None] * scales[None, :]
+        
+        k = min(k, len(codes))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        if candidates is not None:
+            top = candidates[top]
+        return np.take_along_axis(top_scores, order, axis=1), top
+
 class VectorSearch:
     """Memory-optimized vector search for serverless deployment."""
     
+    # Index storage types accepted by build_index
+    SUPPORTED_DTYPES = ("float32", "int8")
+    
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
         """
         Initialize the vector search system with lazy loading.
@@ -48,61 +201,314 @@ class VectorSearch:
         self.index = None
         self.document_chunks = []
         self.embeddings = None
+        self.bm25 = None
     
     def _ensure_model_loaded(self):
         """Ensure the model is loaded when needed"""
         if self.model is None:
-            self.model = get_sentence_transformer()
+            self.model = get_sentence_transformer(self.model_name)
     
-    def build_index(self, document_chunks: List[str]) -> None:
+    def warm_up(self) -> None:
+        """Load the embedding model ahead of first use."""
+        self._ensure_model_loaded()
+    
+    def build_index(self, document_chunks: List[str], dtype: Optional[str] = None,
+                    cache_dir: Optional[str] = None) -> None:
         """
         Build FAISS index from document chunks with memory optimization.
         
         Args:
             document_chunks: List of text chunks to index
+            dtype: "float32" for a FAISS flat index, or "int8" for a quantized index;
+                defaults to DEFAULT_INDEX_DTYPE
+            cache_dir: Optional directory where chunk embeddings are persisted and reused
         """
         if not document_chunks:
             raise Exception("No document chunks provided for indexing")
         
+        dtype = dtype or DEFAULT_INDEX_DTYPE
+        
+        if dtype not in self.SUPPORTED_DTYPES:
+            raise Exception(f"Unsupported index dtype: {dtype}")
+        
         try:
-            # Load model only when needed
-            self._ensure_model_loaded()
-            faiss = get_faiss()
+            # Reuse embeddings persisted by an earlier process, if any
+            embeddings = self._load_cached_embeddings(cache_dir, document_chunks) if cache_dir else None
+            
+            if embeddings is None:
+                embeddings = self._encode_chunks(document_chunks)
+                
+                if cache_dir:
+                    self._save_cached_embeddings(cache_dir, document_chunks, embeddings)
             
             # Store chunks
             self.document_chunks = document_chunks
+            self._add_embeddings(embeddings, dtype)
+            self._build_lexical_index(document_chunks)
             
-            # Generate embeddings with memory optimization
-            self.embeddings = self.model.encode(
-                document_chunks, 
-                convert_to_numpy=True,
-                show_progress_bar=False,
-                batch_size=32  # Smaller batch size for memory efficiency
-            )
+        except Exception as e:
+            raise Exception(f"Failed to build FAISS index: {str(e)}")
+    
+    def _encode_chunks(self, document_chunks: List[str]) -> np.ndarray:
+        """
+        Embed chunks, reusing cached embeddings and encoding only unseen text.
+        
+        Args:
+            document_chunks: List of text chunks
             
-            # Ensure embeddings are float32 for FAISS
-            self.embeddings = self.embeddings.astype(np.float32)
+        Returns:
+            Float32 array of L2-normalized embeddings, one row per chunk
+        """
+        keys = [
+            (self.model_name, hashlib.blake2b(chunk.encode('utf-8'), digest_size=16).digest())
+            for chunk in document_chunks
+        ]
+        
+        rows = [None] * len(document_chunks)
+        missing = {}  # key -> first chunk index, so duplicates are encoded once
+        with _chunk_embedding_lock:
+            for i, key in enumerate(keys):
+                row = _chunk_embedding_cache.get(key)
+                if row is not None:
+                    _chunk_embedding_cache.move_to_end(key)
+                    rows[i] = row
+                elif key not in missing:
+                    missing[key] = i
+        
+        if missing:
+            # Load model only when needed
+            self._ensure_model_loaded()
+            texts = [document_chunks[i] for i in missing.values()]
             
-            # Create FAISS index
-            dimension = self.embeddings.shape[1]
-            self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
+            if EMBED_CONCURRENCY > 1 and len(texts) > EMBEDDING_BATCH_SIZE:
+                # Group similar lengths into the same batch so little padding is
+                # encoded, then scatter the rows back into chunk order
+                order = np.argsort(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)), kind='stable')
+                sorted_texts = [texts[i] for i in order]
+                batches = [sorted_texts[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+                encoded = np.concatenate(list(_get_embed_pool().map(self._encode_batch, batches)))
+                new_embeddings = np.empty_like(encoded)
+                new_embeddings[order] = encoded
+            else:
+                # A single encode() call sorts its input by length internally
+                new_embeddings = self._encode_batch(texts)
             
-            # Normalize embeddings for cosine similarity
-            faiss.normalize_L2(self.embeddings)
+            new_rows = dict(zip(missing, new_embeddings))
+            with _chunk_embedding_lock:
+                for key, row in new_rows.items():
+                    _chunk_embedding_cache[key] = row
+                while len(_chunk_embedding_cache) > CHUNK_EMBEDDING_CACHE_SIZE:
+                    _chunk_embedding_cache.popitem(last=False)
             
-            # Add embeddings to index
-            self.index.add(self.embeddings)
+            if len(missing) == len(document_chunks):
+                # Every chunk was new and distinct, so the batch is already in chunk order
+                return new_embeddings
             
-        except Exception as e:
-            raise Exception(f"Failed to build FAISS index: {str(e)}")
+            for i, key in enumerate(keys):
+                if rows[i] is None:
+                    rows[i] = new_rows[key]
+        
+        return np.stack(rows)
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalized float32 embeddings."""
+        # Normalized embeddings make cosine similarity an inner product for the index
+        embeddings = self.model.encode(
+            texts,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            batch_size=min(EMBEDDING_BATCH_SIZE, len(texts)),
+            normalize_embeddings=True
+        )
+        
+        # Ensure embeddings are float32 for FAISS
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
     
-    def search(self, query: str, k: int = 3) -> List[str]:
+    @classmethod
+    def from_precomputed(cls, embeddings: np.ndarray, document_chunks: List[str],
+                         dtype: str = "float32") -> "VectorSearch":
+        """
+        Create a search index from already computed, L2-normalized chunk embeddings.
+        
+        Args:
+            embeddings: Array of shape (len(document_chunks), dimension)
+            document_chunks: List of text chunks the embeddings belong to
+            dtype: "float32" for a FAISS flat index, or "int8" for a quantized index
+            
+        Returns:
+            VectorSearch instance ready for searching
+        """
+        vector_search = cls()
+        vector_search.document_chunks = document_chunks
+        vector_search._add_embeddings(embeddings, dtype)
+        vector_search._build_lexical_index(document_chunks)
+        return vector_search
+    
+    def _build_lexical_index(self, document_chunks: List[str]) -> None:
+        """Build the BM25 index used to pre-filter large documents, when bm25s is installed."""
+        self.bm25 = None
+        if len(document_chunks) <= BM25_PREFILTER_CANDIDATES:
+            return
+        
+        try:
+            bm25s = get_bm25s()
+        except Exception:
+            return
+        
+        self.bm25 = bm25s.BM25()
+        self.bm25.index(bm25s.tokenize(document_chunks, stopwords="en", show_progress=False),
+                        show_progress=False)
+    
+    def _lexical_candidates(self, query: str, k: int) -> Optional[np.ndarray]:
+        """
+        Return the ids of the chunks that best match the query lexically.
+        
+        Args:
+            query: Search query string
+            k: Number of results the caller needs
+            
+        Returns:
+            Sorted array of candidate chunk ids, or None to score every chunk
+        """
+        if self.bm25 is None:
+            return None
+        
+        bm25s = get_bm25s()
+        query_tokens = bm25s.tokenize([query], stopwords="en", show_progress=False)
+        if not query_tokens.vocab:
+            return None
+        
+        ids, scores = self.bm25.retrieve(query_tokens, k=BM25_PREFILTER_CANDIDATES, show_progress=False)
+        candidates = ids[0][scores[0] > 0]
+        
+        # Too few lexical matches, e.g. paraphrased queries, fall back to full dense search
+        if len(candidates) < k:
+            return None
+        return np.sort(candidates).astype(np.int64)
+    
+    def _search_index(self, query_embeddings: np.ndarray, k: int, candidates: Optional[np.ndarray] = None):
+        """Search the index, restricting scoring to the candidate ids when given."""
+        if candidates is None:
+            return self.index.search(query_embeddings, k)
+        
+        if isinstance(self.index, Int8InnerProductIndex):
+            return self.index.search(query_embeddings, k, candidates)
+        
+        faiss = get_faiss()
+        selector = faiss.IDSelectorBatch(candidates)
+        if isinstance(self.index, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=HNSW_EF_SEARCH)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        return self.index.search(query_embeddings, k, params=params)
+    
+    def _add_embeddings(self, embeddings: np.ndarray, dtype: str) -> None:
+        """Create the index over normalized embeddings."""
+        dimension = embeddings.shape[1]
+        use_hnsw = len(embeddings) > HNSW_THRESHOLD
+        
+        if dtype == "int8":
+            self.embeddings = None
+            try:
+                faiss = get_faiss()
+            except Exception:
+                faiss = None
+            
+            if faiss is None:
+                # Quantized index keeps only the int8 codes and per-row scales
+                self.index = Int8InnerProductIndex(embeddings)
+                return
+            
+            if use_hnsw:
+                # Graph search over 8-bit scalar-quantized vectors keeps the int8
+                # memory savings without scanning every chunk per query
+                self.index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_8bit, HNSW_M,
+                                               faiss.METRIC_INNER_PRODUCT)
+                self.index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+                self.index.hnsw.efSearch = HNSW_EF_SEARCH
+            else:
+                # FAISS scores 8-bit codes with SIMD kernels, far faster than an
+                # integer matmul in NumPy, which has no BLAS path
+                self.index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit,
+                                                        faiss.METRIC_INNER_PRODUCT)
+            vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+            self.index.train(vectors)
+            self.index.add(vectors)
+            return
+        
+        faiss = get_faiss()
+        self.embeddings = embeddings
+        
+        # Create FAISS index
+        if use_hnsw:
+            # Exact search is linear in the number of chunks, use HNSW graph search for large documents
+            self.index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            self.index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            self.index.hnsw.efSearch = HNSW_EF_SEARCH
+        else:
+            self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
+        
+        # Add embeddings to index
+        self.index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+    
+    def _embedding_cache_path(self, cache_dir: str, document_chunks: List[str]) -> str:
+        """Path prefix for persisted embeddings of these chunks with this model."""
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in document_chunks:
+            digest.update(chunk.encode('utf-8'))
+            digest.update(b'\0')
+        model_tag = self.model_name.replace('/', '_')
+        return os.path.join(cache_dir, f"{digest.hexdigest()}.{model_tag}.v{EMBEDDING_CACHE_VERSION}")
+    
+    def _load_cached_embeddings(self, cache_dir: str, document_chunks: List[str]) -> Optional[np.ndarray]:
+        """Memory-map persisted embeddings for these chunks, or return None."""
+        path = self._embedding_cache_path(cache_dir, document_chunks)
+        try:
+            with open(path + ".chunks.json", 'r', encoding='utf-8') as f:
+                if json.load(f) != document_chunks:
+                    return None
+            embeddings = np.load(path + ".emb.npy", mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        
+        if embeddings.ndim != 2 or len(embeddings) != len(document_chunks):
+            return None
+        
+        # Mark the files as recently used so pruning removes colder documents first
+        try:
+            os.utime(path + ".emb.npy")
+            os.utime(path + ".chunks.json")
+        except OSError:
+            pass
+        return embeddings
+    
+    def _save_cached_embeddings(self, cache_dir: str, document_chunks: List[str], embeddings: np.ndarray) -> None:
+        """Persist embeddings for these chunks; failures only cost a cache miss later."""
+        path = self._embedding_cache_path(cache_dir, document_chunks)
+        # Write then rename so concurrent readers never memory-map a partial file
+        tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path + ".emb.npy" + tmp_suffix, 'wb') as f:
+                np.save(f, embeddings)
+            with open(path + ".chunks.json" + tmp_suffix, 'w', encoding='utf-8') as f:
+                json.dump(document_chunks, f)
+            os.replace(path + ".emb.npy" + tmp_suffix, path + ".emb.npy")
+            os.replace(path + ".chunks.json" + tmp_suffix, path + ".chunks.json")
+        except OSError as e:
+            print(f"Could not persist embeddings: {e}")
+            return
+        
+        _prune_embedding_cache(cache_dir)
+    
+    def search(self, query: str, k: int = 3, query_embedding: Optional[np.ndarray] = None) -> List[str]:
         """
         Search for most relevant document chunks based on query with memory optimization.
         
         Args:
             query: Search query string
             k: Number of top results to return
+            query_embedding: Optional precomputed L2-normalized query embedding
             
         Returns:
             List of most relevant document chunks
@@ -114,24 +520,16 @@ class VectorSearch:
             raise Exception("Query cannot be empty")
         
         try:
-            # Ensure model is loaded
-            self._ensure_model_loaded()
-            faiss = get_faiss()
-            
-            # Generate query embedding with smaller batch
-            query_embedding = self.model.encode(
-                [query], 
-                convert_to_numpy=True,
-                show_progress_bar=False,
-                batch_size=1
-            ).astype(np.float32)
-            
-            # Normalize query embedding
-            faiss.normalize_L2(query_embedding)
+            if query_embedding is not None:
+                query_embedding = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+            else:
+                # The encoder normalizes, so no separate normalization pass is needed
+                query_embedding = self.encode_queries([query])
             
-            # Search index
+            # Search index, scoring only BM25 candidates on large documents
             k = min(k, len(self.document_chunks))  # Don't search for more than available
-            scores, indices = self.index.search(query_embedding, k)
+            candidates = self._lexical_candidates(query, k)
+            scores, indices = self._search_index(query_embedding, k, candidates)
             
             # Return relevant chunks
             relevant_chunks = []
@@ -144,6 +542,59 @@ class VectorSearch:
         except Exception as e:
             raise Exception(f"Search failed: {str(e)}")
     
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Encode queries into L2-normalized embeddings in a single forward pass.
+        
+        Recently seen queries are served from a cache and only unseen ones are encoded.
+        
+        Args:
+            queries: List of query strings
+        
+        Returns:
+            Array of shape (len(queries), dimension)
+        """
+        # Whitespace doesn't change the tokens, case can for cased models
+        keys = [(self.model_name, " ".join(query.split())) for query in queries]
+        
+        rows = [None] * len(queries)
+        missing = {}  # key -> first query index, so duplicates are encoded once
+        with _query_embedding_lock:
+            for i, key in enumerate(keys):
+                row = _query_embedding_cache.get(key)
+                if row is not None:
+                    _query_embedding_cache.move_to_end(key)
+                    rows[i] = row
+                elif key not in missing:
+                    missing[key] = i
+        
+        if missing:
+            self._ensure_model_loaded()
+            new_embeddings = self.model.encode(
+                [text for _, text in missing],
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                batch_size=len(missing),
+                normalize_embeddings=True
+            ).astype(np.float32, copy=False)
+            
+            new_rows = dict(zip(missing, new_embeddings))
+            with _query_embedding_lock:
+                for key, row in new_rows.items():
+                    _query_embedding_cache[key] = row
+                while len(_query_embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                    _query_embedding_cache.popitem(last=False)
+            
+            if len(missing) == len(queries):
+                # Every query was new and distinct, so the batch is already in query order
+                return new_embeddings
+            
+            for i, key in enumerate(keys):
+                if rows[i] is None:
+                    rows[i] = new_rows[key]
+        
+        return np.stack(rows)
+    
     def get_similarity_scores(self, query: str, k: int = 3) -> List[tuple]:
         """
         Get similarity scores along with document chunks with memory optimization.
@@ -159,24 +610,13 @@ class VectorSearch:
             raise Exception("Index not built. Call build_index() first.")
         
         try:
-            # Ensure model is loaded
-            self._ensure_model_loaded()
-            faiss = get_faiss()
-            
-            # Generate query embedding
-            query_embedding = self.model.encode(
-                [query], 
-                convert_to_numpy=True,
-                show_progress_bar=False,
-                batch_size=1
-            ).astype(np.float32)
-            
-            # Normalize query embedding
-            faiss.normalize_L2(query_embedding)
+            # Generate a normalized query embedding
+            query_embedding = self.encode_queries([query])
             
-            # Search index
+            # Search index, scoring only BM25 candidates on large documents
             k = min(k, len(self.document_chunks))
-            scores, indices = self.index.search(query_embedding, k)
+            candidates = self._lexical_candidates(query, k)
+            scores, indices = self._search_index(query_embedding, k, candidates)
             
             # Return chunks with scores
             results = []
@@ -202,6 +642,6 @@ class VectorSearch:
         return {
             "status": "built",
             "total_documents": len(self.document_chunks),
-            "embedding_dimension": self.embeddings.shape[1] if self.embeddings is not None else None,
+            "embedding_dimension": self.index.d,
             "index_size": self.index.ntotal
         }
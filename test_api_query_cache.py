@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the query response cache of the API query handler
+"""
+import os
+import sys
+
+import numpy as np
+
+# Add api to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+import index
+
+DOCUMENT = ("This policy covers knee surgery for members aged 18 to 65 in Pune. "
+            "A waiting period of 3 months applies to planned procedures. ") * 20
+
+
+def _query(text):
+    """Run a query against the shared test document."""
+    return index.handler.handle_query(None, {'query': text, 'document_text': DOCUMENT})
+
+
+def test_similar_query_with_different_gender_is_not_reused(monkeypatch):
+    """A near-identical embedding doesn't reuse an answer parsed for a different claimant"""
+    # Embed every query identically, as for claims that differ by one character
+    monkeypatch.setattr(index, "_embed_query", lambda vector_search, query: np.array([1.0, 0.0], dtype=np.float32))
+    index._query_cache.clear()
+
+    male = _query("46M knee surgery in Pune, 3-month policy")
+    female = _query("46F knee surgery in Pune, 3-month policy")
+
+    assert male['query']['parsed_components']['gender'] == 'Male'
+    assert female['query']['parsed_components']['gender'] == 'Female'
+    assert not female['system'].get('cache_hit')
+
+
+def test_similar_query_with_same_components_is_reused(monkeypatch):
+    """A paraphrase that parses to the same components is answered from the cache"""
+    monkeypatch.setattr(index, "_embed_query", lambda vector_search, query: np.array([1.0, 0.0], dtype=np.float32))
+    index._query_cache.clear()
+
+    first = _query("46M knee surgery in Pune, 3-month policy")
+    second = _query("46M knee surgery in Pune, 3-month policy please")
+
+    assert second['system'].get('cache_hit') is True
+    assert second['query']['original'] == "46M knee surgery in Pune, 3-month policy please"
+    assert second['query']['parsed_components'] == first['query']['parsed_components']
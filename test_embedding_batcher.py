@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for dynamic batching of query embeddings
+"""
+import asyncio
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Encoder that records each batch and embeds a query as [len, position in batch]."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, queries):
+        self.calls.append(list(queries))
+        return np.array([[len(query), i] for i, query in enumerate(queries)], dtype=np.float32)
+
+
+def test_concurrent_queries_share_one_encode_call():
+    """Queries arriving together are encoded in one call, each caller getting its own row"""
+    encoder = RecordingEncoder()
+    queries = ["knee", "hip replacement", "dental", "a"]
+
+    async def run():
+        batcher = EmbeddingBatcher(encoder, max_batch_size=32, max_wait_ms=50)
+        return await asyncio.gather(*(batcher.encode(query) for query in queries))
+
+    results = asyncio.run(run())
+
+    assert encoder.calls == [queries]
+    for i, (query, row) in enumerate(zip(queries, results)):
+        np.testing.assert_array_equal(row, [len(query), i])
+
+
+def test_batches_are_capped_at_max_batch_size():
+    """More concurrent queries than max_batch_size are split across calls in arrival order"""
+    encoder = RecordingEncoder()
+    queries = [f"query {i}" for i in range(5)]
+
+    async def run():
+        batcher = EmbeddingBatcher(encoder, max_batch_size=2, max_wait_ms=50)
+        return await asyncio.gather(*(batcher.encode(query) for query in queries))
+
+    results = asyncio.run(run())
+
+    assert encoder.calls == [queries[0:2], queries[2:4], queries[4:5]]
+    assert [int(row[1]) for row in results] == [0, 1, 0, 1, 0]
+
+
+def test_encoder_errors_reach_every_caller():
+    """A failed batch raises in each waiting caller and the batcher keeps serving"""
+    calls = []
+
+    def flaky_encoder(queries):
+        calls.append(list(queries))
+        if len(calls) == 1:
+            raise RuntimeError("model unavailable")
+        return np.zeros((len(queries), 2), dtype=np.float32)
+
+    async def run():
+        batcher = EmbeddingBatcher(flaky_encoder, max_wait_ms=50)
+        failed = await asyncio.gather(batcher.encode("a"), batcher.encode("b"), return_exceptions=True)
+        recovered = await batcher.encode("c")
+        return failed, recovered
+
+    failed, recovered = asyncio.run(run())
+
+    assert all(isinstance(error, RuntimeError) for error in failed)
+    assert recovered.shape == (2,)
+    assert calls == [["a", "b"], ["c"]]
+
+
+def test_batcher_works_across_event_loops():
+    """A batcher reused from a new event loop starts a fresh queue and worker"""
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_wait_ms=1)
+
+    first = asyncio.run(batcher.encode("first"))
+    second = asyncio.run(batcher.encode("second query"))
+
+    assert first[0] == len("first")
+    assert second[0] == len("second query")
+    assert encoder.calls == [["first"], ["second query"]]
+
+
+def test_bad_batch_shape_fails_callers_and_keeps_serving():
+    """An encoder returning the wrong number of rows fails that batch instead of hanging"""
+    calls = []
+
+    def short_encoder(queries):
+        calls.append(list(queries))
+        rows = len(queries) - 1 if len(calls) == 1 else len(queries)
+        return np.zeros((rows, 2), dtype=np.float32)
+
+    async def run():
+        batcher = EmbeddingBatcher(short_encoder, max_wait_ms=50)
+        failed = await asyncio.wait_for(
+            asyncio.gather(batcher.encode("a"), batcher.encode("b"), return_exceptions=True), 5
+        )
+        recovered = await asyncio.wait_for(batcher.encode("c"), 5)
+        return failed, recovered
+
+    failed, recovered = asyncio.run(run())
+
+    assert all(isinstance(error, ValueError) for error in failed)
+    assert recovered.shape == (2,)
+
+
+def test_cancelled_worker_fails_pending_callers_and_restarts():
+    """Callers waiting on a worker that dies get an error, and later calls start a new worker"""
+    encoder = RecordingEncoder()
+
+    async def run():
+        batcher = EmbeddingBatcher(encoder, max_wait_ms=1000)
+        pending = [asyncio.ensure_future(batcher.encode(query)) for query in ("a", "b")]
+        # Let the worker take the queries and start waiting for more
+        await asyncio.sleep(0.05)
+        batcher._worker.cancel()
+        failed = await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), 5)
+        recovered = await asyncio.wait_for(batcher.encode("after restart"), 5)
+        return failed, recovered
+
+    failed, recovered = asyncio.run(run())
+
+    assert all(isinstance(error, RuntimeError) for error in failed)
+    assert recovered[0] == len("after restart")
+    assert encoder.calls == [["after restart"]]
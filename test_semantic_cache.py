@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic response cache
+"""
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import semantic_cache
+from semantic_cache import SemanticCache
+
+
+def _unit(vector):
+    """Return the vector L2-normalized as float32."""
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _at_cosine(cosine):
+    """Unit vector whose cosine similarity with [1, 0] is the given value."""
+    return _unit([cosine, np.sqrt(1.0 - cosine ** 2)])
+
+
+def test_exact_hit_ignores_case_and_whitespace():
+    """Exact-match lookups use normalized query text"""
+    cache = SemanticCache()
+    cache.store("doc", "Knee surgery in Pune", "answer")
+
+    assert cache.lookup("doc", "  knee   SURGERY in pune ") == "answer"
+    assert cache.lookup("other-doc", "knee surgery in pune") is None
+    assert cache.get_stats() == {"documents": 1, "entries": 1, "hits": 1, "misses": 1}
+
+
+def test_near_duplicate_above_threshold_hits():
+    """A paraphrase whose embedding is close enough reuses the cached answer"""
+    cache = SemanticCache(threshold=0.9)
+    cache.store("doc", "knee surgery coverage", "answer", embedding=_unit([1.0, 0.0]))
+
+    assert cache.lookup("doc", "is knee surgery covered", embedding=_at_cosine(0.95)) == "answer"
+
+
+def test_near_duplicate_below_threshold_misses():
+    """A query that isn't similar enough is a miss"""
+    cache = SemanticCache(threshold=0.9)
+    cache.store("doc", "knee surgery coverage", "answer", embedding=_unit([1.0, 0.0]))
+
+    assert cache.lookup("doc", "dental waiting period", embedding=_at_cosine(0.85)) is None
+    # Without an embedding only exact matches can hit
+    assert cache.lookup("doc", "is knee surgery covered") is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    """A document's answers are dropped once they are older than the TTL"""
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+
+    cache = SemanticCache(ttl_seconds=60)
+    cache.store("doc", "knee surgery", "answer")
+
+    now[0] += 59
+    assert cache.lookup("doc", "knee surgery") == "answer"
+
+    now[0] += 2
+    assert cache.lookup("doc", "knee surgery") is None
+    assert cache.get_stats()["documents"] == 0
+
+
+def test_least_recently_used_document_is_evicted():
+    """Only max_documents documents are kept, evicting the least recently used"""
+    cache = SemanticCache(max_documents=2)
+    cache.store("a", "query", "answer a")
+    cache.store("b", "query", "answer b")
+
+    # Touch "a" so "b" becomes the least recently used
+    assert cache.lookup("a", "query") == "answer a"
+    cache.store("c", "query", "answer c")
+
+    assert cache.lookup("b", "query") is None
+    assert cache.lookup("a", "query") == "answer a"
+    assert cache.lookup("c", "query") == "answer c"
+
+
+def test_full_document_entry_starts_over():
+    """A document at max_entries_per_document is reset rather than growing"""
+    cache = SemanticCache(max_entries_per_document=2)
+    cache.store("doc", "first", 1, embedding=_unit([1.0, 0.0]))
+    cache.store("doc", "second", 2, embedding=_unit([0.0, 1.0]))
+    cache.store("doc", "third", 3, embedding=_unit([1.0, 1.0]))
+
+    assert cache.lookup("doc", "first") is None
+    assert cache.lookup("doc", "third") == 3
+    assert cache.get_stats()["entries"] == 1
+
+
+def _two_step_lookup(cache, document_key, query, embedding):
+    """Exact probe then embedding lookup, as the API endpoints do."""
+    cached = cache.lookup(document_key, query, count_miss=False)
+    if cached is None:
+        cached = cache.lookup(document_key, query, embedding)
+    return cached
+
+
+def test_two_step_lookup_counts_each_query_once():
+    """An exact probe followed by an embedding lookup records one hit or one miss"""
+    cache = SemanticCache(threshold=0.9)
+    cache.store("doc", "knee surgery coverage", "answer", embedding=_unit([1.0, 0.0]))
+
+    assert _two_step_lookup(cache, "doc", "knee surgery coverage", _unit([1.0, 0.0])) == "answer"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    assert _two_step_lookup(cache, "doc", "is knee surgery covered", _at_cosine(0.95)) == "answer"
+    assert (cache.hits, cache.misses) == (2, 0)
+
+    assert _two_step_lookup(cache, "doc", "dental waiting period", _at_cosine(0.5)) is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    assert _two_step_lookup(cache, "unknown-doc", "knee surgery coverage", None) is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_rejected_result_counts_as_miss():
+    """A cached result the caller rejects is not returned and counts as a miss"""
+    cache = SemanticCache()
+    cache.store("doc", "knee surgery", {"gender": "Male"})
+
+    assert cache.lookup("doc", "knee surgery", accept=lambda result: result["gender"] == "Female") is None
+    assert (cache.hits, cache.misses) == (0, 1)
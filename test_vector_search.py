@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for int8 vector search indexes
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import vector_search
+from vector_search import Int8InnerProductIndex, VectorSearch
+
+K = 3
+
+
+def _normalize(vectors):
+    """L2-normalize each row as float32."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def corpus():
+    """
+    Small fixed corpus of orthonormal chunk embeddings.
+    
+    Each query mixes three chunks with distinct weights, so the expected top-k
+    ranking has clear score gaps rather than near ties.
+    """
+    rng = np.random.default_rng(0)
+    basis, _ = np.linalg.qr(rng.standard_normal((64, 64)))
+    embeddings = np.ascontiguousarray(basis[:48], dtype=np.float32)
+    chunks = [f"chunk {i}" for i in range(len(embeddings))]
+    weights = np.array([0.8, 0.5, 0.3])
+    queries = _normalize([weights @ embeddings[list(rows)] for rows in ((3, 17, 42), (40, 0, 9), (21, 22, 5))])
+    return embeddings, chunks, queries
+
+
+def _exact_top_k(embeddings, queries, k):
+    """Reference float32 top-k by brute-force inner product."""
+    return np.argsort(-(queries @ embeddings.T), axis=1)[:, :k]
+
+
+def test_int8_top_k_matches_float32(corpus):
+    """The int8 FAISS index ranks the same top-k chunks as the float32 index"""
+    pytest.importorskip("faiss")
+    embeddings, chunks, queries = corpus
+
+    float_search = VectorSearch.from_precomputed(embeddings, chunks, dtype="float32")
+    int8_search = VectorSearch.from_precomputed(embeddings, chunks, dtype="int8")
+
+    for query in queries:
+        expected = float_search.search("query", k=K, query_embedding=query)
+        assert int8_search.search("query", k=K, query_embedding=query) == expected
+        assert expected[0] == chunks[int(_exact_top_k(embeddings, query[None, :], 1)[0, 0])]
+
+
+def test_numpy_int8_fallback_without_faiss(corpus, monkeypatch):
+    """Without FAISS, int8 indexes fall back to the NumPy index with the same ranking"""
+    embeddings, chunks, queries = corpus
+
+    def missing_faiss():
+        raise Exception("faiss-cpu not available")
+
+    monkeypatch.setattr(vector_search, "get_faiss", missing_faiss)
+    search = VectorSearch.from_precomputed(embeddings, chunks, dtype="int8")
+    assert isinstance(search.index, Int8InnerProductIndex)
+
+    expected = _exact_top_k(embeddings, queries, K)
+    for query, indices in zip(queries, expected):
+        assert search.search("query", k=K, query_embedding=query) == [chunks[i] for i in indices]
+
+
+def test_int8_index_scores_and_shapes(corpus):
+    """Int8InnerProductIndex returns sorted scores close to the float32 inner products"""
+    embeddings, _, queries = corpus
+    index = Int8InnerProductIndex(embeddings)
+
+    assert (index.ntotal, index.d) == embeddings.shape
+    assert index.codes.dtype == np.int8
+
+    scores, indices = index.search(queries, K)
+    assert scores.shape == indices.shape == (len(queries), K)
+    assert np.all(np.diff(scores, axis=1) <= 0)
+    np.testing.assert_array_equal(indices, _exact_top_k(embeddings, queries, K))
+
+    exact = np.take_along_axis(queries @ embeddings.T, indices, axis=1)
+    np.testing.assert_allclose(scores, exact, atol=0.02)
+
+
+def test_int8_index_restricted_to_candidates(corpus):
+    """Candidate ids limit which rows are scored and are returned as original ids"""
+    embeddings, _, queries = corpus
+    index = Int8InnerProductIndex(embeddings)
+    # Leave out each query's best chunk, so the runners-up must be returned
+    candidates = np.setdiff1d(np.arange(len(embeddings)), [3, 40, 21])
+
+    _, indices = index.search(queries, 2, candidates)
+    np.testing.assert_array_equal(indices, [[17, 42], [0, 9], [22, 5]])
+
+
+def test_persisted_embeddings_round_trip(corpus, tmp_path):
+    """Saved embeddings load back memory-mapped, with no temporary files left behind"""
+    embeddings, chunks, _ = corpus
+    search = VectorSearch()
+
+    search._save_cached_embeddings(str(tmp_path), chunks, embeddings)
+    loaded = search._load_cached_embeddings(str(tmp_path), chunks)
+
+    np.testing.assert_array_equal(loaded, embeddings)
+    assert isinstance(loaded, np.memmap)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    assert search._load_cached_embeddings(str(tmp_path), chunks[:-1]) is None
+
+
+def test_embedding_cache_is_pruned_to_size_cap(corpus, tmp_path, monkeypatch):
+    """Saving past the size cap removes the least recently used documents' files"""
+    embeddings, chunks, _ = corpus
+    search = VectorSearch()
+    documents = [[f"doc {d} {chunk}" for chunk in chunks] for d in range(3)]
+
+    # Room for about two documents' embeddings and chunk lists
+    monkeypatch.setattr(vector_search, "EMBEDDING_CACHE_MAX_BYTES", int(2.5 * embeddings.nbytes))
+    for d, document_chunks in enumerate(documents):
+        search._save_cached_embeddings(str(tmp_path), document_chunks, embeddings)
+        # Give each save a distinct, increasing modification time
+        for name in os.listdir(tmp_path):
+            if name.startswith(os.path.basename(search._embedding_cache_path(str(tmp_path), document_chunks))):
+                os.utime(tmp_path / name, (1000 + d, 1000 + d))
+
+    assert search._load_cached_embeddings(str(tmp_path), documents[0]) is None
+    assert search._load_cached_embeddings(str(tmp_path), documents[2]) is not None
+    total = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    assert total <= vector_search.EMBEDDING_CACHE_MAX_BYTES